@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from blocks import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from compact import CompactDocument
+from htmlnode import escape_html
+from main import generate_pages_recursive
+from split_nodes import text_to_textnodes
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "and carried across middle earth by a hobbit named frodo baggins"
+).split()
+TEMPLATE = """<!doctype html>
+<html>
+  <head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head>
+  <body><article>{{ Content }}</article></body>
+</html>
+"""
+
+
+def random_words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def inline_text(rng, count):
+    parts = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f"**{random_words(rng, 2)}**")
+        elif roll < 0.2:
+            parts.append(f"_{random_words(rng, 2)}_")
+        elif roll < 0.25:
+            parts.append(f"`{rng.choice(WORDS)}`")
+        else:
+            parts.append(random_words(rng, 1))
+    return " ".join(parts)
+
+
+def links_block(rng, size):
+    links = [
+        f"[{random_words(rng, 2)}](/pages/{rng.randrange(10000)})" for _ in range(size)
+    ]
+    return "See " + ", ".join(links) + " and ![map](/images/map.png)."
+
+
+def list_block(rng, size):
+    if rng.random() < 0.5:
+        return "\n".join(f"- {inline_text(rng, 8)}" for _ in range(size))
+    return "\n".join(f"{i + 1}. {inline_text(rng, 8)}" for i in range(size))
+
+
+def code_block(rng, size):
+    lines = [
+        f"    {rng.choice(WORDS)}_{i} = call({random_words(rng, 3)!r}) < {i} & mask"
+        for i in range(size * 5)
+    ]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def paragraph_block(rng, size):
+    lines = [inline_text(rng, 12) for _ in range(max(1, size // 4))]
+    return "\n".join(lines)
+
+
+def mixed_block(rng, size):
+    roll = rng.random()
+    if roll < 0.1:
+        return f"{'#' * rng.randint(2, 6)} {random_words(rng, 4)}"
+    if roll < 0.2:
+        return "\n".join(f"> {inline_text(rng, 8)}" for _ in range(3))
+    builder = rng.choice([links_block, list_block, code_block, paragraph_block])
+    return builder(rng, size)
+
+
+SHAPES = {
+    "links": links_block,
+    "lists": list_block,
+    "code": code_block,
+    "paragraphs": paragraph_block,
+    "mixed": mixed_block,
+}
+
+
+def generate_markdown(rng, shape, blocks, block_size):
+    builder = SHAPES[shape]
+    body = [builder(rng, block_size) for _ in range(blocks)]
+    return "\n\n".join([f"# {random_words(rng, 4)}"] + body) + "\n"
+
+
+def generate_corpus(content_dir, pages, shape, blocks, block_size, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        folder = os.path.join(content_dir, f"section{i % 10}", f"page{i}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, "index.md")
+        with open(path, "w") as page_file:
+            page_file.write(generate_markdown(rng, shape, blocks, block_size))
+        paths.append(path)
+    return paths
+
+
+def time_stage(func, items, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "seconds": best,
+        "items": len(items),
+        "ns_per_item": best * 1e9 / len(items) if items else 0.0,
+    }
+
+
+def classify_by_type(blocks, repeat):
+    blocks_by_type = {}
+    for block in blocks:
+        blocks_by_type.setdefault(block_to_block_type(block).value, []).append(block)
+    return {
+        block_type: time_stage(block_to_block_type, typed_blocks, repeat)
+        for block_type, typed_blocks in sorted(blocks_by_type.items())
+    }
+
+
+def inline_texts(blocks):
+    texts = []
+    for block in blocks:
+        if block.startswith("```"):
+            continue
+        texts.extend(line.lstrip("#>-0123456789. ") for line in block.split("\n"))
+    return texts
+
+
+def leaf_values(nodes):
+    values = []
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if node.children is None:
+            values.append(node.value)
+        else:
+            stack.extend(node.children)
+    return values
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    shape="mixed",
+    pages=100,
+    blocks=20,
+    block_size=20,
+    seed=0,
+    repeat=3,
+    jobs=1,
+):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        content_dir = os.path.join(tmp_dir, "content")
+        paths = generate_corpus(content_dir, pages, shape, blocks, block_size, seed)
+        documents = []
+        for path in paths:
+            with open(path) as page_file:
+                documents.append(page_file.read())
+
+        all_blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+        html_nodes = [markdown_to_html_node(doc) for doc in documents]
+        compact_documents = [CompactDocument.from_markdown(doc) for doc in documents]
+        block_types = classify_by_type(all_blocks, repeat)
+        stages = {
+            "markdown_to_blocks": time_stage(markdown_to_blocks, documents, repeat),
+            "block_to_block_type": time_stage(block_to_block_type, all_blocks, repeat),
+            "text_to_textnodes": time_stage(
+                text_to_textnodes, inline_texts(all_blocks), repeat
+            ),
+            "escape_html": time_stage(escape_html, leaf_values(html_nodes), repeat),
+            "to_html": time_stage(lambda node: node.to_html(), html_nodes, repeat),
+            "compact_to_html": time_stage(
+                lambda document: document.to_html(), compact_documents, repeat
+            ),
+        }
+
+        template_path = os.path.join(tmp_dir, "template.html")
+        with open(template_path, "w") as template_file:
+            template_file.write(TEMPLATE)
+        dest_dir = os.path.join(tmp_dir, "docs")
+        with contextlib.redirect_stdout(io.StringIO()):
+            stages["generate_pages_recursive"] = time_stage(
+                lambda _: generate_pages_recursive(
+                    "/", content_dir, template_path, dest_dir, jobs=jobs
+                ),
+                [None],
+                repeat,
+            )
+        stages["generate_pages_recursive"]["items"] = pages
+        stages["generate_pages_recursive"]["ns_per_item"] = (
+            stages["generate_pages_recursive"]["seconds"] * 1e9 / pages
+        )
+
+        corpus_bytes = sum(len(doc.encode()) for doc in documents)
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "corpus": {
+            "shape": shape,
+            "pages": pages,
+            "blocks": blocks,
+            "block_size": block_size,
+            "seed": seed,
+            "bytes": corpus_bytes,
+        },
+        "repeat": repeat,
+        "jobs": jobs,
+        "stages": stages,
+        "block_types": block_types,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the markdown pipeline on a synthetic corpus."
+    )
+    parser.add_argument("--shape", choices=sorted(SHAPES), default="mixed")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=20,
+        help="links, list items or code lines (x5) per block",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("-o", "--output", help="write the JSON report to a file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_benchmarks(
+        args.shape,
+        args.pages,
+        args.blocks,
+        args.block_size,
+        args.seed,
+        args.repeat,
+        args.jobs,
+    )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import re
 from enum import Enum
+from typing import NamedTuple
 
 from htmlnode import ParentNode, text_node_to_html_node
 from split_nodes import text_to_textnodes
@@ -15,6 +16,15 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+LIST_BLOCK_TYPES = (BlockType.ORDERED_LIST, BlockType.UNORDERED_LIST)
+
+
+class ParsedBlock(NamedTuple):
+    block_type: BlockType
+    tag: str
+    items: list[list[TextNode]]
+
+
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
     children = []
@@ -24,25 +34,88 @@ def markdown_to_html_node(markdown):
     return ParentNode("div", children, None)
 
 
+class MarkdownStream:
+    # Renders blocks one at a time as they are written, so a document never
+    # has to be held in memory as a whole tree.
+    __slots__ = ("blocks",)
+
+    def __init__(self, blocks) -> None:
+        self.blocks = blocks
+
+    def write_html(self, write, base_path: str = "/") -> None:
+        write("<div>")
+        for block in self.blocks:
+            block_to_html_node(block).write_html(write, base_path)
+        write("</div>")
+
+    def to_html(self, base_path: str = "/") -> str:
+        chunks = []
+        self.write_html(chunks.append, base_path)
+        return "".join(chunks)
+
+
+class ParsedDocument:
+    __slots__ = ("parsed_blocks",)
+
+    def __init__(self, parsed_blocks) -> None:
+        self.parsed_blocks = parsed_blocks
+
+    def write_html(self, write, base_path: str = "/") -> None:
+        write("<div>")
+        for parsed_block in self.parsed_blocks:
+            parsed_block_to_html_node(parsed_block).write_html(write, base_path)
+        write("</div>")
+
+    def to_html(self, base_path: str = "/") -> str:
+        chunks = []
+        self.write_html(chunks.append, base_path)
+        return "".join(chunks)
+
+
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+    return parsed_block_to_html_node(parse_block(block))
+
+
+def parse_block(block, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return parse_paragraph(block)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return parse_heading(block)
     if block_type == BlockType.CODE:
-        return code_to_html_node(block)
+        return parse_code(block)
     if block_type == BlockType.ORDERED_LIST:
-        return olist_to_html_node(block)
+        return parse_olist(block)
     if block_type == BlockType.UNORDERED_LIST:
-        return ulist_to_html_node(block)
+        return parse_ulist(block)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return parse_quote(block)
     raise ValueError("invalid block type")
 
 
+def parsed_block_to_html_node(parsed_block):
+    if parsed_block.block_type == BlockType.CODE:
+        child = text_node_to_html_node(parsed_block.items[0][0])
+        code = ParentNode("code", [child])
+        return ParentNode(parsed_block.tag, [code])
+
+    if parsed_block.block_type in LIST_BLOCK_TYPES:
+        html_items = [
+            ParentNode("li", text_nodes_to_children(text_nodes))
+            for text_nodes in parsed_block.items
+        ]
+        return ParentNode(parsed_block.tag, html_items)
+
+    children = text_nodes_to_children(parsed_block.items[0])
+    return ParentNode(parsed_block.tag, children)
+
+
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+    return text_nodes_to_children(text_to_textnodes(text))
+
+
+def text_nodes_to_children(text_nodes):
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
@@ -50,14 +123,13 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
+def parse_paragraph(block):
     lines = block.split("\n")
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
-    return ParentNode("p", children)
+    return ParsedBlock(BlockType.PARAGRAPH, "p", [text_to_textnodes(paragraph)])
 
 
-def heading_to_html_node(block):
+def parse_heading(block):
     level = 0
     for c in block:
         if c == "#":
@@ -67,18 +139,61 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    return ParsedBlock(BlockType.HEADING, f"h{level}", [text_to_textnodes(text)])
 
 
-def code_to_html_node(block):
+def parse_code(block):
     if not block.startswith("```") and block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
-    return ParentNode("pre", [code])
+    return ParsedBlock(BlockType.CODE, "pre", [[TextNode(text, TextType.TEXT)]])
+
+
+def parse_olist(block):
+    items = block.split("\n")
+    text_nodes = [text_to_textnodes(item[3:]) for item in items]
+    return ParsedBlock(BlockType.ORDERED_LIST, "ol", text_nodes)
+
+
+def parse_ulist(block):
+    items = block.split("\n")
+    text_nodes = [text_to_textnodes(item[2:]) for item in items]
+    return ParsedBlock(BlockType.UNORDERED_LIST, "ul", text_nodes)
+
+
+def parse_quote(block):
+    lines = block.split("\n")
+    new_lines = []
+    for line in lines:
+        if not line.startswith(">"):
+            raise ValueError("invalid quote block")
+        new_lines.append(line.lstrip(">").strip())
+    content = " ".join(new_lines)
+    return ParsedBlock(BlockType.QUOTE, "blockquote", [text_to_textnodes(content)])
+
+
+def paragraph_to_html_node(block):
+    return parsed_block_to_html_node(parse_paragraph(block))
+
+
+def heading_to_html_node(block):
+    return parsed_block_to_html_node(parse_heading(block))
+
+
+def code_to_html_node(block):
+    return parsed_block_to_html_node(parse_code(block))
+
+
+def olist_to_html_node(block):
+    return parsed_block_to_html_node(parse_olist(block))
+
+
+def ulist_to_html_node(block):
+    return parsed_block_to_html_node(parse_ulist(block))
+
+
+def quote_to_html_node(block):
+    return parsed_block_to_html_node(parse_quote(block))
 
 
 def markdown_to_blocks(markdown: str) -> list[str]:
@@ -92,60 +207,81 @@ def markdown_to_blocks(markdown: str) -> list[str]:
     return filtered_blocks
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[3:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ol", html_items)
+def iter_blocks(chunks):
+    for _, block in iter_numbered_blocks(chunks):
+        yield block
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[2:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ul", html_items)
+def iter_numbered_blocks(chunks):
+    # Same blocks as markdown_to_blocks over the joined chunks, yielded with
+    # the line they start on as soon as their closing blank line has been read.
+    pending = []
+    line = 1
+    for chunk in chunks:
+        continues_separator = (
+            pending and pending[-1].endswith("\n") and chunk.startswith("\n")
+        )
+        if "\n\n" not in chunk and not continues_separator:
+            pending.append(chunk)
+            continue
+        blocks = ("".join(pending) + chunk).split("\n\n")
+        pending = [blocks.pop()]
+        for block in blocks:
+            if block != "":
+                yield numbered_block(block, line)
+            line += block.count("\n") + 2
 
+    block = "".join(pending)
+    if block != "":
+        yield numbered_block(block, line)
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
-    new_lines = []
-    for line in lines:
-        if not line.startswith(">"):
-            raise ValueError("invalid quote block")
-        new_lines.append(line.lstrip(">").strip())
-    content = " ".join(new_lines)
-    children = text_to_children(content)
-    return ParentNode("blockquote", children)
+
+def numbered_block(block, line):
+    stripped = block.lstrip()
+    line += block.count("\n", 0, len(block) - len(stripped))
+    return line, stripped.rstrip()
+
+
+HEADING_PATTERN = re.compile(r"\s*#{1,6}\s+.+")
 
 
 def block_to_block_type(markdown_block: str) -> BlockType:
-    if re.fullmatch(r"^\s*#{1,6}\s+.+", markdown_block):
-        return BlockType.HEADING
+    first = markdown_block[:1]
+    if first.isspace():
+        # Only headings and code blocks may be indented.
+        first = markdown_block.lstrip()[:1]
+        if first != "#" and first != "`":
+            return BlockType.PARAGRAPH
 
-    if re.fullmatch(r"^\s*(`{3,}[\s\S]*`{3,})", markdown_block):
-        return BlockType.CODE
+    if first == "#":
+        if HEADING_PATTERN.fullmatch(markdown_block):
+            return BlockType.HEADING
+        return BlockType.PARAGRAPH
 
-    lines = markdown_block.split("\n")
+    if first == "`":
+        # Equivalent to fullmatching \s*`{3,}[\s\S]*`{3,} without scanning the
+        # whole block.
+        fenced = markdown_block.lstrip()
+        if len(fenced) >= 6 and fenced.startswith("```") and fenced.endswith("```"):
+            return BlockType.CODE
+        return BlockType.PARAGRAPH
 
-    for line in lines:
-        if not line.startswith("> "):
-            break
+    if first == ">":
+        for line in markdown_block.split("\n"):
+            if line != ">" and not line.startswith("> "):
+                return BlockType.PARAGRAPH
         return BlockType.QUOTE
 
-    for line in lines:
-        if not line.startswith("- "):
-            break
+    if first == "-":
+        for line in markdown_block.split("\n"):
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
         return BlockType.UNORDERED_LIST
 
-    for i, line in enumerate(lines):
-        if not line.startswith(f"{i + 1}. "):
-            break
+    if first.isdigit():
+        for i, line in enumerate(markdown_block.split("\n"), 1):
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
         return BlockType.ORDERED_LIST
 
     return BlockType.PARAGRAPH
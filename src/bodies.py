@@ -0,0 +1,85 @@
+import os
+
+BODY_CHUNK_SIZE = 1 << 20
+
+
+class BodyStore:
+    # Rendered page bodies, each stored under a fresh random name so a stored
+    # body never changes once the manifest points to it.
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.folder, f"{name}.html")
+
+    def writer(self, title: str) -> "BodyWriter":
+        os.makedirs(self.folder, exist_ok=True)
+        return BodyWriter(self, title)
+
+    def exists(self, name: str) -> bool:
+        return name is not None and os.path.isfile(self.path(name))
+
+    def prune(self, keep: set[str]) -> int:
+        try:
+            file_names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return 0
+
+        keep_files = {f"{name}.html" for name in keep if name is not None}
+        removed = 0
+        for file_name in file_names:
+            if file_name not in keep_files:
+                os.remove(os.path.join(self.folder, file_name))
+                removed += 1
+        return removed
+
+    def __repr__(self) -> str:
+        return f"BodyStore(folder={self.folder})"
+
+
+class BodyWriter:
+    def __init__(self, store: BodyStore, title: str) -> None:
+        self.store = store
+        self.name = os.urandom(16).hex()
+        self.tmp_path = f"{store.path(self.name)}.tmp"
+        self.file = open(self.tmp_path, "w")
+        self.file.write(f"{title}\n")
+        self.write = self.file.write
+
+    def commit(self) -> str:
+        self.file.close()
+        os.replace(self.tmp_path, self.store.path(self.name))
+        return self.name
+
+    def discard(self) -> None:
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class TeeContent:
+    def __init__(self, content, body_write) -> None:
+        self.content = content
+        self.body_write = body_write
+
+    def write_html(self, write, base_path: str = "/") -> None:
+        body_write = self.body_write
+
+        def tee(chunk):
+            write(chunk)
+            body_write(chunk)
+
+        self.content.write_html(tee, base_path)
+
+
+class StoredBody:
+    def __init__(self, body_file) -> None:
+        self.body_file = body_file
+
+    def write_html(self, write, base_path: str = "/") -> None:
+        for chunk in iter(lambda: self.body_file.read(BODY_CHUNK_SIZE), ""):
+            write(chunk)
+
+
+def read_stored_page(body_file) -> tuple[str, StoredBody]:
+    return body_file.readline()[:-1], StoredBody(body_file)
@@ -0,0 +1,185 @@
+from array import array
+
+from blocks import LIST_BLOCK_TYPES, BlockType, markdown_to_blocks, parse_block
+from htmlnode import (
+    ParentNode,
+    escape_html,
+    props_to_html,
+    tag_strings,
+    text_node_to_leaf_parts,
+)
+
+
+class CompactDocument:
+    # Nodes are stored in pre-order in parallel arrays instead of one object
+    # per node: node i spans the nodes i..subtree_ends[i] - 1, and its text
+    # is buffer[text_starts[i]:text_ends[i]].
+    __slots__ = (
+        "tag_names",
+        "tag_ids",
+        "text_starts",
+        "text_ends",
+        "subtree_ends",
+        "prop_ids",
+        "props",
+        "buffer",
+        "_tag_index",
+        "_pending_text",
+        "_text_length",
+    )
+
+    def __init__(self) -> None:
+        self.tag_names = [None]
+        self.tag_ids = array("H")
+        self.text_starts = array("Q")
+        self.text_ends = array("Q")
+        self.subtree_ends = array("Q")
+        self.prop_ids = array("q")
+        self.props = []
+        self.buffer = ""
+        self._tag_index = {None: 0}
+        self._pending_text = []
+        self._text_length = 0
+
+    @classmethod
+    def from_markdown(cls, markdown: str) -> "CompactDocument":
+        document = cls()
+        root = document.open_parent("div")
+        for block in markdown_to_blocks(markdown):
+            document.add_parsed_block(parse_block(block))
+        document.close_parent(root)
+        document._text_buffer()
+        return document
+
+    @classmethod
+    def from_node(cls, node) -> "CompactDocument":
+        document = cls()
+        document.add_node(node)
+        document._text_buffer()
+        return document
+
+    def __len__(self) -> int:
+        return len(self.tag_ids)
+
+    def add_node(self, node) -> None:
+        if not isinstance(node, ParentNode):
+            self.add_leaf(node.tag, node.value, node.props)
+            return
+        if node.children is None:
+            raise ValueError("All parent nodes must have an attributed children value.")
+        index = self.open_parent(node.tag, node.props)
+        for child in node.children:
+            self.add_node(child)
+        self.close_parent(index)
+
+    def add_parsed_block(self, parsed_block) -> None:
+        index = self.open_parent(parsed_block.tag)
+        if parsed_block.block_type == BlockType.CODE:
+            code = self.open_parent("code")
+            self.add_text_nodes(parsed_block.items[0])
+            self.close_parent(code)
+        elif parsed_block.block_type in LIST_BLOCK_TYPES:
+            for text_nodes in parsed_block.items:
+                item = self.open_parent("li")
+                self.add_text_nodes(text_nodes)
+                self.close_parent(item)
+        else:
+            self.add_text_nodes(parsed_block.items[0])
+        self.close_parent(index)
+
+    def add_text_nodes(self, text_nodes) -> None:
+        for text_node in text_nodes:
+            self.add_leaf(*text_node_to_leaf_parts(text_node))
+
+    def add_leaf(self, tag: str, value: str, props: dict[str, str] = None) -> int:
+        if value is None:
+            raise ValueError("All leaf nodes must have a value.")
+        index = self._add(tag, props)
+        self._pending_text.append(value)
+        self.text_starts.append(self._text_length)
+        self._text_length += len(value)
+        self.text_ends.append(self._text_length)
+        self.subtree_ends.append(index + 1)
+        return index
+
+    def open_parent(self, tag: str, props: dict[str, str] = None) -> int:
+        if tag is None:
+            raise ValueError("All parent nodes must have a tag.")
+        index = self._add(tag, props)
+        self.text_starts.append(self._text_length)
+        self.text_ends.append(self._text_length)
+        self.subtree_ends.append(index + 1)
+        return index
+
+    def close_parent(self, index: int) -> None:
+        self.subtree_ends[index] = len(self.tag_ids)
+
+    def _add(self, tag: str, props: dict[str, str]) -> int:
+        tag_id = self._tag_index.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_index[tag] = len(self.tag_names)
+            self.tag_names.append(tag)
+        self.tag_ids.append(tag_id)
+
+        if props:
+            self.prop_ids.append(len(self.props))
+            self.props.append(tuple(props.items()))
+        else:
+            self.prop_ids.append(-1)
+        return len(self.tag_ids) - 1
+
+    def _text_buffer(self) -> str:
+        if self._pending_text:
+            self.buffer += "".join(self._pending_text)
+            self._pending_text = []
+        return self.buffer
+
+    def props_to_html(self, index: int, base_path: str = "/") -> str:
+        prop_id = self.prop_ids[index]
+        if prop_id < 0:
+            return ""
+        return props_to_html(self.props[prop_id], base_path)
+
+    def to_html(self, base_path: str = "/") -> str:
+        chunks = []
+        self.write_html(chunks.append, base_path)
+        return "".join(chunks)
+
+    def write_html(self, write, base_path: str = "/") -> None:
+        buffer = self._text_buffer()
+        tags = [None] + [tag_strings(tag) for tag in self.tag_names[1:]]
+        open_tags = [None] + [tag.open for tag in tags[1:]]
+        close_tags = [None] + [tag.close for tag in tags[1:]]
+        prop_ids = self.prop_ids
+
+        closing = []
+        next_close = -1
+        nodes = zip(self.tag_ids, self.text_starts, self.text_ends, self.subtree_ends)
+        for index, (tag_id, start, end, subtree_end) in enumerate(nodes):
+            while next_close == index:
+                write(close_tags[closing.pop()[1]])
+                next_close = closing[-1][0] if closing else -1
+
+            if not tag_id:
+                write(escape_html(buffer[start:end]))
+                continue
+
+            if prop_ids[index] < 0:
+                open_tag = open_tags[tag_id]
+            else:
+                _, open_start, open_end, _ = tags[tag_id]
+                props = self.props_to_html(index, base_path)
+                open_tag = f"{open_start}{props}{open_end}"
+            if subtree_end == index + 1:
+                text = escape_html(buffer[start:end])
+                write(f"{open_tag}{text}{close_tags[tag_id]}")
+            else:
+                write(open_tag)
+                closing.append((subtree_end, tag_id))
+                next_close = subtree_end
+
+        while closing:
+            write(close_tags[closing.pop()[1]])
+
+    def __repr__(self) -> str:
+        return f"CompactDocument(nodes={len(self)}, text_length={self._text_length})"
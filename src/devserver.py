@@ -0,0 +1,118 @@
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = """<script>
+(function () {
+  var version = null;
+  setInterval(function () {
+    fetch("%s").then(function (response) {
+      return response.text();
+    }).then(function (text) {
+      if (version !== null && text !== version) {
+        location.reload();
+      }
+      version = text;
+    }).catch(function () {});
+  }, 500);
+})();
+</script>
+""" % LIVE_RELOAD_PATH
+
+
+def snapshot_files(paths: list[str]) -> dict[str, int]:
+    snapshot = {}
+    for path in paths:
+        if os.path.isfile(path):
+            snapshot[path] = os.stat(path).st_mtime_ns
+            continue
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                file_path = os.path.join(dir_path, file_name)
+                try:
+                    snapshot[file_path] = os.stat(file_path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+    return snapshot
+
+
+def diff_snapshots(
+    old_snapshot: dict[str, int],
+    new_snapshot: dict[str, int],
+) -> tuple[list[str], list[str]]:
+    changed = [
+        path for path, mtime in new_snapshot.items() if old_snapshot.get(path) != mtime
+    ]
+    removed = [path for path in old_snapshot if path not in new_snapshot]
+    return sorted(changed), sorted(removed)
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, build_version=None, **kwargs):
+        self.build_version = build_version
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == LIVE_RELOAD_PATH:
+            self.send_text(str(self.build_version()), "text/plain")
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                super().do_GET()
+                return
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+
+        with open(path, "r") as html_file:
+            html = html_file.read()
+        head, body_end, tail = html.rpartition("</body>")
+        if body_end:
+            html = head + LIVE_RELOAD_SCRIPT + body_end + tail
+        else:
+            html += LIVE_RELOAD_SCRIPT
+        self.send_text(html, "text/html")
+
+    def send_text(self, text, content_type):
+        payload = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LiveReloadServer:
+    def __init__(self, directory: str, port: int, host: str = "localhost") -> None:
+        self.version = 0
+        handler = partial(
+            LiveReloadHandler,
+            directory=directory,
+            build_version=lambda: self.version,
+        )
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def reload(self) -> None:
+        self.version += 1
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
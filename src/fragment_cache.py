@@ -0,0 +1,234 @@
+import hashlib
+import multiprocessing.util
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from blocks import ParsedBlock, block_to_html_node, parsed_block_to_html_node
+
+# New fragments are written to disk in batches of about this many bytes.
+FLUSH_BYTES = 4 << 20
+
+_OPEN_CACHES = {}
+
+
+def open_fragment_cache(path, version, max_memory_bytes, max_disk_bytes):
+    # Worker processes unpickle the cache once per task: reuse the instance
+    # already open in this process so its in-memory LRU survives between pages.
+    config = (path, version, max_memory_bytes, max_disk_bytes)
+    cache = _OPEN_CACHES.get(config)
+    if cache is None or cache.pid != os.getpid():
+        cache = FragmentCache(*config)
+        # Workers are never closed: write what is left when they exit.
+        multiprocessing.util.Finalize(cache, cache.flush, exitpriority=0)
+    return cache
+
+
+class FragmentCache:
+    def __init__(
+        self,
+        path: str = None,
+        version: str = "",
+        max_memory_bytes: int = 16 << 20,
+        max_disk_bytes: int = 512 << 20,
+    ) -> None:
+        self.path = path
+        self.version = version
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._new_fragments = {}
+        self._new_bytes = 0
+        self._used_keys = set()
+        self._connection = None
+        self._disk_has_version = False
+        self.pid = os.getpid()
+        _OPEN_CACHES[(path, version, max_memory_bytes, max_disk_bytes)] = self
+
+    def __reduce__(self):
+        return (
+            open_fragment_cache,
+            (self.path, self.version, self.max_memory_bytes, self.max_disk_bytes),
+        )
+
+    def _db(self):
+        if self._connection is None and self.path is not None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fragments ("
+                "key TEXT PRIMARY KEY, html TEXT NOT NULL, "
+                "size INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS versions (version TEXT PRIMARY KEY)"
+            )
+            # Keys include the version: when no build of this version wrote
+            # to the cache yet, every block is new and lookups are skipped.
+            row = self._connection.execute(
+                "SELECT 1 FROM versions WHERE version = ?", (self.version,)
+            ).fetchone()
+            self._disk_has_version = row is not None
+        return self._connection
+
+    def fragments(self, blocks, parsed_blocks=None) -> "CachedFragments":
+        return CachedFragments(blocks, self, parsed_blocks)
+
+    def key(self, block: str, base_path: str) -> str:
+        digest = hashlib.sha256()
+        for part in (self.version, base_path, block):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str:
+        html = self._memory.get(key)
+        if html is not None:
+            self._memory.move_to_end(key)
+            self._used_keys.add(key)
+            self.hits += 1
+            return html
+
+        html = self._new_fragments.get(key)
+        if html is not None:
+            self._remember(key, html)
+            self.hits += 1
+            return html
+
+        db = self._db()
+        if db is not None and self._disk_has_version:
+            row = db.execute(
+                "SELECT html FROM fragments WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self._used_keys.add(key)
+                self.hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, html: str) -> None:
+        self._remember(key, html)
+        if self.path is not None:
+            self._new_fragments[key] = html
+            self._new_bytes += len(html)
+            if self._new_bytes >= FLUSH_BYTES:
+                self.flush()
+
+    def _remember(self, key: str, html: str) -> None:
+        size = len(html)
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = html
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def render_block(
+        self,
+        block: str,
+        base_path: str = "/",
+        parsed_blocks: list[ParsedBlock] = None,
+        index: int = 0,
+    ) -> str:
+        key = self.key(block, base_path)
+        html = self.get(key)
+        if html is None:
+            if parsed_blocks is None:
+                html_node = block_to_html_node(block)
+            else:
+                html_node = parsed_block_to_html_node(parsed_blocks[index])
+            html = html_node.to_html(base_path)
+            self.put(key, html)
+        return html
+
+    def flush(self) -> None:
+        db = self._db()
+        if db is None or not (self._new_fragments or self._used_keys):
+            return
+
+        now = time.time()
+        with db:
+            db.execute("INSERT OR IGNORE INTO versions VALUES (?)", (self.version,))
+            db.executemany(
+                "INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?)",
+                [
+                    (key, html, len(html), now)
+                    for key, html in self._new_fragments.items()
+                ],
+            )
+            db.executemany(
+                "UPDATE fragments SET used = ? WHERE key = ?",
+                [(now, key) for key in self._used_keys],
+            )
+        self._new_fragments = {}
+        self._new_bytes = 0
+        self._used_keys = set()
+        self._disk_has_version = True
+
+    def evict(self) -> int:
+        db = self._db()
+        if db is None:
+            return 0
+        (size,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM fragments").fetchone()
+        if size <= self.max_disk_bytes:
+            return 0
+
+        total = 0
+        stale_keys = []
+        rows = db.execute("SELECT key, size FROM fragments ORDER BY used DESC")
+        for key, size in rows:
+            total += size
+            if total > self.max_disk_bytes:
+                stale_keys.append((key,))
+        with db:
+            db.executemany("DELETE FROM fragments WHERE key = ?", stale_keys)
+        return len(stale_keys)
+
+    def close(self) -> None:
+        self.flush()
+        if self._connection is not None:
+            self.evict()
+            self._connection.close()
+            self._connection = None
+
+    def __repr__(self) -> str:
+        return (
+            f"FragmentCache(path={self.path}, hits={self.hits}, misses={self.misses})"
+        )
+
+
+class CachedFragments:
+    def __init__(
+        self,
+        blocks: list[str],
+        cache: FragmentCache,
+        parsed_blocks: list[ParsedBlock] = None,
+    ) -> None:
+        self.blocks = blocks
+        self.cache = cache
+        self.parsed_blocks = parsed_blocks
+
+    def write_html(self, write, base_path: str = "/") -> None:
+        write("<div>")
+        for index, block in enumerate(self.blocks):
+            write(self.cache.render_block(block, base_path, self.parsed_blocks, index))
+        write("</div>")
+
+    def to_html(self, base_path: str = "/") -> str:
+        chunks = []
+        self.write_html(chunks.append, base_path)
+        return "".join(chunks)
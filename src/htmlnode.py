@@ -1,7 +1,108 @@
+import sys
+from typing import NamedTuple
+
 from textnode import TextType
 
+URL_PROPS = ("href", "src")
+VOID_TAGS = frozenset(("br", "hr", "img"))
+TAG_VOCABULARY = (
+    "div",
+    "p",
+    "b",
+    "i",
+    "code",
+    "a",
+    "img",
+    "li",
+    "ul",
+    "ol",
+    "blockquote",
+    "pre",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+)
+
+
+class TagStrings(NamedTuple):
+    open: str
+    open_start: str
+    open_end: str
+    close: str
+
+
+def tag_strings(tag: str) -> TagStrings:
+    strings = TAGS.get(tag)
+    if strings is None:
+        tag = sys.intern(tag)
+        if tag in VOID_TAGS:
+            strings = TagStrings(f"<{tag} />", f"<{tag}", " />", "")
+        else:
+            strings = TagStrings(f"<{tag}>", f"<{tag}", ">", f"</{tag}>")
+        TAGS[tag] = strings
+    return strings
+
+
+def attribute_prefix(key: str) -> str:
+    prefix = ATTRIBUTE_PREFIXES.get(key)
+    if prefix is None:
+        prefix = ATTRIBUTE_PREFIXES[sys.intern(key)] = f' {key}="'
+    return prefix
+
+
+# Open and close tags are formatted once per tag name, not once per node.
+TAGS = {}
+ATTRIBUTE_PREFIXES = {}
+for tag in TAG_VOCABULARY:
+    tag_strings(tag)
+for key in URL_PROPS + ("alt",):
+    attribute_prefix(key)
+del tag, key
+
+
+def escape_html(text: str) -> str:
+    # Most text runs need no escaping and cost three substring scans. When
+    # they do, str.replace over the whole run is many times faster than
+    # str.translate or a regex substitution.
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    value = escape_html(value)
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    return value
+
+
+def rebase_url(base_path: str, url: str) -> str:
+    if base_path == "/" or not url.startswith("/") or url.startswith("//"):
+        return url
+    return base_path + url[1:]
+
+
+def props_to_html(props, base_path: str = "/") -> str:
+    parts = []
+    for key, value in props:
+        if key in URL_PROPS:
+            value = rebase_url(base_path, value)
+        parts.append(attribute_prefix(key))
+        parts.append(escape_attribute(value))
+        parts.append('"')
+    return "".join(parts)
+
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str = None,
@@ -14,23 +115,26 @@ class HTMLNode:
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, base_path: str = "/"):
+        chunks = []
+        self.write_html(chunks.append, base_path)
+        return "".join(chunks)
+
+    def write_html(self, write, base_path: str = "/"):
         raise NotImplementedError
 
-    def props_to_html(self):
+    def props_to_html(self, base_path: str = "/"):
         if self.props is None:
             return ""
-
-        html = ""
-        for key, value in self.props.items():
-            html += f' {key}="{value}"'
-        return html
+        return props_to_html(self.props.items(), base_path)
 
     def __repr__(self):
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
@@ -39,16 +143,27 @@ class LeafNode(HTMLNode):
     ) -> None:
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def write_html(self, write, base_path: str = "/"):
         if self.value is None:
             raise ValueError("All leaf nodes must have a value.")
         if self.tag is None:
-            return self.value
+            write(escape_html(self.value))
+            return
 
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        strings = TAGS.get(self.tag) or tag_strings(self.tag)
+        open_tag, open_start, open_end, close_tag = strings
+        if self.props is None:
+            write(open_tag)
+        else:
+            write(open_start + self.props_to_html(base_path) + open_end)
+        if close_tag:
+            write(escape_html(self.value))
+            write(close_tag)
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
@@ -57,34 +172,41 @@ class ParentNode(HTMLNode):
     ) -> None:
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def write_html(self, write, base_path: str = "/"):
         if self.tag is None:
             raise ValueError("All parent nodes must have a tag.")
 
         if self.children is None:
             raise ValueError("All parent nodes must have an attributed children value.")
-        html_children = ""
-        for child in self.children:
-            html_children += child.to_html()
 
-        return f"<{self.tag}{self.props_to_html()}>{html_children}</{self.tag}>"
+        strings = TAGS.get(self.tag) or tag_strings(self.tag)
+        open_tag, open_start, open_end, close_tag = strings
+        if self.props is None:
+            write(open_tag)
+        else:
+            write(open_start + self.props_to_html(base_path) + open_end)
+        for child in self.children:
+            child.write_html(write, base_path)
+        write(close_tag)
 
 
 def text_node_to_html_node(text_node):
+    return LeafNode(*text_node_to_leaf_parts(text_node))
+
+
+def text_node_to_leaf_parts(text_node):
     match text_node.text_type:
         case TextType.TEXT:
-            return LeafNode(None, text_node.text)
+            return None, text_node.text, None
         case TextType.BOLD:
-            return LeafNode("b", text_node.text)
+            return "b", text_node.text, None
         case TextType.ITALIC:
-            return LeafNode("i", text_node.text)
+            return "i", text_node.text, None
         case TextType.CODE:
-            return LeafNode("code", text_node.text)
+            return "code", text_node.text, None
         case TextType.LINK:
-            return LeafNode("a", text_node.text, props={"href": text_node.url})
+            return "a", text_node.text, {"href": text_node.url}
         case TextType.IMAGE:
-            return LeafNode(
-                "img", "", props={"src": text_node.url, "alt": text_node.text}
-            )
+            return "img", "", {"src": text_node.url, "alt": text_node.text}
         case _:
             raise ValueError("text_type doesn't correspond to any of TextType.")
@@ -0,0 +1,176 @@
+import os
+import posixpath
+from typing import NamedTuple
+from urllib.parse import unquote, urlsplit
+
+from blocks import BlockType, block_to_block_type
+from split_nodes import iter_link_matches
+
+
+class BrokenLink(NamedTuple):
+    page: str
+    line: int
+    url: str
+
+    def __str__(self) -> str:
+        return f"{self.page}:{self.line}: broken link {self.url}"
+
+
+def extract_block_links(block: str, line: int) -> list[tuple[int, str]]:
+    # Only blocks starting with a backtick or whitespace can be code blocks.
+    first = block[:1]
+    if first == "`" or first.isspace():
+        if block_to_block_type(block) == BlockType.CODE:
+            return []
+    return [
+        (line + block.count("\n", 0, match.start()), match.group(3))
+        for match in iter_link_matches(block)
+    ]
+
+
+def collect_links(numbered_blocks, links):
+    for line, block in numbered_blocks:
+        if "](" in block:
+            links.extend(extract_block_links(block, line))
+        yield block
+
+
+def link_target(url: str, page_dir: str) -> str:
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        path = path.lstrip("/")
+    else:
+        path = posixpath.join(page_dir, path)
+    path = posixpath.normpath(path)
+    return "" if path == "." else path
+
+
+def site_targets(dest_dir_path: str) -> set[str]:
+    # Every file under dest_dir_path, plus the folders that can be linked to
+    # because they hold an index.html.
+    targets = set()
+    for dir_path, _, file_names in os.walk(dest_dir_path):
+        folder = os.path.relpath(dir_path, dest_dir_path).replace(os.sep, "/")
+        folder = "" if folder == "." else folder
+        for file_name in file_names:
+            targets.add(posixpath.join(folder, file_name))
+            if file_name == "index.html":
+                targets.add(folder)
+    return targets
+
+
+def output_targets(dest_path: str, dest_dir_path: str) -> list[str]:
+    # The targets an output file adds to site_targets(dest_dir_path).
+    path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if posixpath.basename(path) == "index.html":
+        return [path, posixpath.dirname(path)]
+    return [path]
+
+
+class LinkIndex:
+    # check() walks the output folder once; later calls only re-check pages
+    # added since, and pages linking to targets added or removed since.
+    def __init__(self) -> None:
+        self.pages = {}
+        self.targets = None
+        self.broken = {}
+        self.linked = {}
+        self.page_targets = {}
+        self.unchecked = set()
+
+    def add(self, from_path: str, dest_path: str, links: list) -> None:
+        self.pages[from_path] = (dest_path, links)
+        self.unchecked.add(from_path)
+
+    def discard(self, from_path: str) -> None:
+        self.pages.pop(from_path, None)
+        self.broken.pop(from_path, None)
+        self.unchecked.discard(from_path)
+        self._unlink(from_path)
+
+    def add_output(self, dest_path: str, dest_dir_path: str) -> None:
+        if self.targets is None:
+            return
+        for target in output_targets(dest_path, dest_dir_path):
+            if target not in self.targets:
+                self.targets.add(target)
+                self.unchecked.update(self.linked.get(target, ()))
+
+    def discard_output(self, dest_path: str, dest_dir_path: str) -> None:
+        if self.targets is None:
+            return
+        for target in output_targets(dest_path, dest_dir_path):
+            if target in self.targets:
+                self.targets.remove(target)
+                self.unchecked.update(self.linked.get(target, ()))
+
+    def rescan(self, folder_path: str, dest_dir_path: str) -> None:
+        # Replaces the cached targets below folder_path with what is on disk.
+        if self.targets is None:
+            return
+        found = set()
+        for dir_path, _, file_names in os.walk(folder_path):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                found.update(output_targets(path, dest_dir_path))
+        prefix = os.path.relpath(folder_path, dest_dir_path).replace(os.sep, "/")
+        cached = {
+            target
+            for target in self.targets
+            if target == prefix or target.startswith(f"{prefix}/")
+        }
+        self.targets.difference_update(cached - found)
+        self.targets.update(found)
+        for target in cached ^ found:
+            self.unchecked.update(self.linked.get(target, ()))
+
+    def __len__(self) -> int:
+        return sum(len(links) for _, links in self.pages.values())
+
+    def check(self, dest_dir_path: str) -> list[BrokenLink]:
+        if self.targets is None:
+            self.targets = site_targets(dest_dir_path)
+        for from_path in self.unchecked:
+            self._check_page(from_path, dest_dir_path)
+        self.unchecked.clear()
+        return [
+            broken_link
+            for from_path in sorted(self.broken)
+            for broken_link in self.broken[from_path]
+        ]
+
+    def _check_page(self, from_path: str, dest_dir_path: str) -> None:
+        self._unlink(from_path)
+        dest_path, links = self.pages[from_path]
+        page_dir = os.path.relpath(os.path.dirname(dest_path), dest_dir_path)
+        page_dir = "" if page_dir == "." else page_dir.replace(os.sep, "/")
+        page_targets = set()
+        broken = []
+        for line, url in links:
+            target = link_target(url, page_dir)
+            if target is None:
+                continue
+            page_targets.add(target)
+            if target not in self.targets:
+                broken.append(BrokenLink(from_path, line, url))
+        for target in page_targets:
+            self.linked.setdefault(target, set()).add(from_path)
+        self.page_targets[from_path] = page_targets
+        if broken:
+            self.broken[from_path] = broken
+        else:
+            self.broken.pop(from_path, None)
+
+    def _unlink(self, from_path: str) -> None:
+        for target in self.page_targets.pop(from_path, ()):
+            linking = self.linked[target]
+            linking.discard(from_path)
+            if not linking:
+                del self.linked[target]
+
+    def __repr__(self) -> str:
+        return f"LinkIndex(pages={len(self.pages)}, links={len(self)})"
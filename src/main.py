@@ -1,81 +1,842 @@
+import argparse
+import cProfile
+import io
+import itertools
 import os
-import shutil
-import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
 
-from blocks import markdown_to_html_node
+from bodies import BodyStore, read_stored_page
+from blocks import (
+    block_to_block_type,
+    iter_numbered_blocks,
+    parse_block,
+    parsed_block_to_html_node,
+)
+from htmlnode import ParentNode, escape_html
+from devserver import LiveReloadServer, diff_snapshots, snapshot_files
+from fragment_cache import FragmentCache
+from links import LinkIndex, collect_links
+from manifest import Manifest, generator_version, remove_empty_folders
+from parse_cache import ParseCache
+from pipeline import PagePipeline, make_dest_dirs, read_source, write_output
+from profiling import BuildProfiler, PageProfile
+from render import (
+    PageResult,
+    extract_title,
+    parse_page,
+    render_page,
+    render_parsed_page,
+)
+from search import (
+    SEARCH_INDEX_FOLDER,
+    SEARCH_INDEX_VERSION,
+    build_search_index,
+    page_terms,
+    remove_search_index,
+    search_index_exists,
+)
+from shards import (
+    merge_shards,
+    parse_shard,
+    shard_dest_dir,
+    shard_folder,
+    shard_manifest_path,
+    shard_pages,
+)
+from sync import LINK_MODES, SyncStats, sync_file, sync_folder
+from template import TEMPLATE_NAME, TemplateSet
 
+MANIFEST_PATH = ".cache/manifest.json"
+FRAGMENT_CACHE_PATH = ".cache/fragments.sqlite3"
+PARSE_CACHE_PATH = ".cache/parses"
+PARSE_CACHE_MAX_BYTES = 256 << 20
+BODY_STORE_PATH = ".cache/bodies"
+SHARD_DIR = ".cache/shards"
+WATCH_INTERVAL = 0.2
 
-def reset_public_folder():
-    shutil.rmtree("docs/")
-    shutil.copytree("static/", "docs/")
+_WORKER_TEMPLATES = {}
 
 
-def extract_title(markdown):
-    lines = markdown.split("\n")
-    title = lines[0]
-    if not title.startswith("# "):
-        raise Exception("No header")
+class BuildOptions(NamedTuple):
+    fragment_cache: FragmentCache = None
+    parse_cache: ParseCache = None
+    body_store: BodyStore = None
+    search: bool = False
+    profile: bool = False
 
-    title = title[2:].strip()
-    return title
 
+def rewrap_page(from_path, template, dest_path, body_path):
+    print(f"Rewrapping page {dest_path} using {template.path}")
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(body_path, "r") as body_file, open(tmp_path, "w") as dest_file:
+            title, body = read_stored_page(body_file)
+            template.write(dest_file.write, Title=escape_html(title), Content=body)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-def generate_page(base_path, from_path, template_path, dest_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
-    with open(from_path, "r") as from_file:
-        content_from_file = "".join(from_file.readlines())
+def generate_page(from_path, template, dest_path, options=BuildOptions()):
+    if options.parse_cache is not None and not options.profile:
+        source = read_source(from_path)
+        if source is not None:
+            return generate_page_from_source(
+                from_path, source, template, dest_path, write_output, options
+            )
 
-    with open(template_path, "r") as template_file:
-        content_template = "".join(template_file.readlines())
+    print(f"Generating page from {from_path} to {dest_path} using {template.path}")
+    if options.profile:
+        return generate_page_profiled(from_path, template, dest_path, options)
 
-    html_node = markdown_to_html_node(content_from_file)
-    html = html_node.to_html()
-    title = extract_title(content_from_file)
+    # Blocks are read, rendered and written one at a time; the page goes to a
+    # temporary file first so a failing block never leaves half a page behind.
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(from_path, "r") as from_file, open(tmp_path, "w") as dest_file:
+            result = render_page(
+                from_file,
+                template,
+                dest_file.write,
+                options.fragment_cache,
+                options.body_store,
+                options.search,
+            )
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return result
 
-    content = content_template.replace("{{ Title }}", title)
-    content = content.replace("{{ Content }}", html)
 
-    content = content.replace('href="/', f'href="{base_path}')
-    content = content.replace('src="/', f'src="{base_path}')
+def generate_page_from_source(
+    from_path, source, template, dest_path, write_page, options=BuildOptions()
+):
+    print(f"Generating page from {from_path} to {dest_path} using {template.path}")
+    parse_cache = options.parse_cache
+    chunks = []
+    if parse_cache is None:
+        result = render_page(
+            io.StringIO(source),
+            template,
+            chunks.append,
+            options.fragment_cache,
+            options.body_store,
+            options.search,
+        )
+    else:
+        page = parse_cache.get(source)
+        if page is None:
+            page = parse_page(source, options.search)
+            parse_cache.put(source, page)
+        elif options.search and page.terms is None:
+            # Cached by a build without --search-index.
+            page = page._replace(terms=page_terms(page.parsed_blocks))
+            parse_cache.put(source, page)
+        result = render_parsed_page(
+            page,
+            template,
+            chunks.append,
+            options.fragment_cache,
+            options.body_store,
+            options.search,
+        )
+    write_page(dest_path, chunks)
+    return result
 
-    current_folder = ""
-    for folder in dest_path.split("/")[:-1]:
-        current_folder = os.path.join(current_folder, folder)
-        if not os.path.isdir(current_folder):
-            os.mkdir(current_folder)
 
-    with open(dest_path, "w") as dest_file:
-        dest_file.write(content)
+def generate_page_profiled(from_path, template, dest_path, options=BuildOptions()):
+    # Same output as generate_page, with the fused streaming steps run one
+    # after the other so each stage can be timed on its own.
+    page_profile = PageProfile(from_path)
+    with page_profile.stage("read"):
+        with open(from_path, "r") as from_file:
+            content_from_file = from_file.read()
+    with page_profile.stage("split"):
+        links = []
+        blocks = list(collect_links(iter_numbered_blocks([content_from_file]), links))
+    with page_profile.stage("classify"):
+        block_types = [block_to_block_type(block) for block in blocks]
+    with page_profile.stage("inline"):
+        parsed_blocks = [
+            parse_block(block, block_type)
+            for block, block_type in zip(blocks, block_types)
+        ]
+        terms = page_terms(parsed_blocks) if options.search else None
+    with page_profile.stage("build"):
+        children = [parsed_block_to_html_node(parsed) for parsed in parsed_blocks]
+        html_node = ParentNode("div", children, None)
+    with page_profile.stage("serialize"):
+        html = html_node.to_html(template.base_path)
+    with page_profile.stage("template"):
+        title = extract_title(content_from_file)
+        chunks = []
+        template.write(chunks.append, Title=escape_html(title), Content=html)
+    with page_profile.stage("write"):
+        write_output(dest_path, chunks)
+        body = None
+        if options.body_store is not None:
+            body_writer = options.body_store.writer(title)
+            try:
+                body_writer.write(html)
+            except BaseException:
+                body_writer.discard()
+                raise
+            body = body_writer.commit()
+    if options.search:
+        return PageResult(links, page_profile, body=body, search=(title, terms))
+    return PageResult(links, page_profile, body=body)
 
 
-def generate_pages_recursive(base_path, dir_path_content, template_path, dest_dir_path):
-    objs = os.listdir(dir_path_content)
-    for obj in objs:
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for obj in sorted(os.listdir(dir_path_content)):
         from_path_obj = os.path.join(dir_path_content, obj)
         dest_path_obj = os.path.join(dest_dir_path, obj)
+        if obj == TEMPLATE_NAME:
+            continue
         if os.path.isfile(from_path_obj):
             dest_path_obj = dest_path_obj.replace(".md", ".html")
-            generate_page(
-                base_path,
-                from_path_obj,
-                template_path,
-                dest_path_obj,
-            )
+            pages.append((from_path_obj, dest_path_obj))
+        else:
+            pages.extend(collect_pages(from_path_obj, dest_path_obj))
+    return pages
+
+
+def build_inputs(base_path, search=False):
+    inputs = {
+        "generator": generator_version(),
+        "base_path": base_path,
+    }
+    if search:
+        inputs["search_index"] = str(SEARCH_INDEX_VERSION)
+    return inputs
+
+
+def generate_pages_recursive(
+    base_path,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest=None,
+    jobs=1,
+    profiler=None,
+    options=BuildOptions(),
+    shard=None,
+):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        pages = shard_pages(pages, dir_path_content, shard)
+    templates = TemplateSet(dir_path_content, template_path, base_path)
+
+    dirty_pages = pages
+    rewrap_pages = []
+    if manifest is not None:
+        inputs = build_inputs(base_path, options.search)
+        dependencies = page_dependencies(pages, templates)
+        dirty_pages = manifest.dirty_pages(pages, inputs, dependencies)
+        for dest_path in manifest.remove_stale_outputs(pages, dest_dir_path):
+            print(f"Removing stale page {dest_path}")
+        dirty_pages, rewrap_pages = rewrap_clean_bodies(
+            dirty_pages, templates, manifest, options.body_store
+        )
+
+    make_dest_dirs(dirty_pages)
+    if jobs > 1 and len(dirty_pages) > 1:
+        page_links = generate_pages_parallel(
+            dirty_pages, templates, jobs, manifest, profiler, options
+        )
+    elif options.profile:
+        page_links = {}
+        for from_path, dest_path in dirty_pages:
+            template = templates.for_page(from_path)
+            result = generate_page(from_path, template, dest_path, options)
+            record_page(from_path, result, page_links, manifest, profiler)
+    else:
+        page_links = generate_pages_pipelined(dirty_pages, templates, manifest, options)
+
+    print(f"Generated {len(dirty_pages)} of {len(pages)} pages")
+    if rewrap_pages:
+        print(f"Rewrapped {len(rewrap_pages)} unchanged pages in their new template")
+
+    link_index = LinkIndex()
+    for from_path, dest_path in pages:
+        links = page_links.get(from_path)
+        if links is None:
+            links = manifest.pages[from_path]["links"]
+        link_index.add(from_path, dest_path, links)
+    return link_index
+
+
+def page_dependencies(pages, templates):
+    # Everything a page reads besides its own source; a change to any of
+    # these only rebuilds the pages that list it.
+    return {from_path: [templates.for_page(from_path).path] for from_path, _ in pages}
+
+
+def rewrap_clean_bodies(dirty_pages, templates, manifest, body_store=None):
+    if body_store is None:
+        return dirty_pages, []
+    rewrap_pages = [
+        (from_path, dest_path)
+        for from_path, dest_path in dirty_pages
+        if from_path in manifest.rewrappable
+        and body_store.exists(manifest.pages[from_path]["body"])
+    ]
+    rewrap_paths = {from_path for from_path, _ in rewrap_pages}
+    dirty_pages = [page for page in dirty_pages if page[0] not in rewrap_paths]
+    for from_path, dest_path in rewrap_pages:
+        body_path = body_store.path(manifest.pages[from_path]["body"])
+        rewrap_page(from_path, templates.for_page(from_path), dest_path, body_path)
+        manifest.record(from_path)
+    return dirty_pages, rewrap_pages
+
+
+def generate_pages_pipelined(pages, templates, manifest=None, options=BuildOptions()):
+    # Sources the pipeline left on disk are streamed and never parsed whole.
+    streamed_options = options._replace(parse_cache=None)
+    page_links = {}
+    with PagePipeline(pages) as pipeline:
+        for from_path, dest_path, source in pipeline:
+            template = templates.for_page(from_path)
+            if source is None:
+                result = generate_page(from_path, template, dest_path, streamed_options)
+            else:
+                result = generate_page_from_source(
+                    from_path, source, template, dest_path, pipeline.write, options
+                )
+            record_page(from_path, result, page_links, manifest)
+    return page_links
+
+
+def record_page(from_path, result, page_links, manifest=None, profiler=None):
+    page_links[from_path] = result.links
+    if profiler is not None:
+        profiler.add(result.profile)
+    if manifest is not None:
+        manifest.record(from_path, result.links, result.body, result.search)
+
+
+def init_worker(templates, track_allocations=False):
+    # Templates are compiled once in the parent and sent once per worker;
+    # tasks only carry the path of the template they use.
+    _WORKER_TEMPLATES.update(templates)
+    if track_allocations:
+        tracemalloc.start()
+
+
+def generate_page_in_worker(from_path, template_path, dest_path, options):
+    template = _WORKER_TEMPLATES[template_path]
+    return generate_page(from_path, template, dest_path, options)
+
+
+def generate_pages_parallel(
+    pages, templates, jobs, manifest=None, profiler=None, options=BuildOptions()
+):
+    from_paths = [from_path for from_path, _ in pages]
+    dest_paths = [dest_path for _, dest_path in pages]
+    template_paths = [templates.for_page(from_path).path for from_path in from_paths]
+    chunksize = max(1, len(pages) // (jobs * 4))
+    track_allocations = profiler is not None and profiler.track_allocations
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(templates.templates, track_allocations),
+    ) as executor:
+        results = executor.map(
+            generate_page_in_worker,
+            from_paths,
+            template_paths,
+            dest_paths,
+            itertools.repeat(options),
+            chunksize=chunksize,
+        )
+        page_links = {}
+        for from_path, result in zip(from_paths, results):
+            record_page(from_path, result, page_links, manifest, profiler)
+    return page_links
+
+
+def watch(
+    base_path,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest,
+    port,
+    checksum=False,
+    link_mode="copy",
+    options=BuildOptions(),
+):
+    templates = TemplateSet(dir_path_content, template_path, base_path)
+    inputs = build_inputs(base_path, options.search)
+    watched = [dir_path_content, "./static/", template_path]
+    snapshot = snapshot_files(watched)
+    link_index = manifest_link_index(manifest)
+
+    server = LiveReloadServer(dest_dir_path, port)
+    server.start()
+    print(f"Serving {dest_dir_path} on {server.url}, watching for changes")
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            new_snapshot = snapshot_files(watched)
+            changed, removed = diff_snapshots(snapshot, new_snapshot)
+            snapshot = new_snapshot
+            if not changed and not removed:
+                continue
+
+            started = time.perf_counter()
+            try:
+                if any(
+                    path == template_path or os.path.basename(path) == TEMPLATE_NAME
+                    for path in changed + removed
+                ):
+                    templates = TemplateSet(dir_path_content, template_path, base_path)
+                rebuild_changed(
+                    changed,
+                    removed,
+                    dir_path_content,
+                    templates,
+                    dest_dir_path,
+                    manifest,
+                    inputs,
+                    checksum,
+                    link_mode,
+                    options,
+                    link_index,
+                )
+            except Exception as error:
+                print(f"Build failed: {error}")
+                continue
+            if options.search:
+                write_search_index(manifest, dest_dir_path, base_path)
+                link_index.rescan(
+                    os.path.join(dest_dir_path, SEARCH_INDEX_FOLDER), dest_dir_path
+                )
+            manifest.save()
+            if options.fragment_cache is not None:
+                options.fragment_cache.flush()
+                options.fragment_cache.evict()
+            report_broken_links(link_index, dest_dir_path)
+            server.reload()
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"Rebuilt in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+def rebuild_changed(
+    changed,
+    removed,
+    dir_path_content,
+    templates,
+    dest_dir_path,
+    manifest,
+    inputs,
+    checksum=False,
+    link_mode="copy",
+    options=BuildOptions(),
+    link_index=None,
+):
+    # link_index, when given, is kept in step with the pages and outputs
+    # added or removed here.
+    stats = SyncStats()
+    # Pages a failed rebuild left on an old template are retried.
+    pages = {
+        from_path: manifest.pages[from_path]["output"]
+        for from_path in manifest.stale_dependents()
+        if from_path in manifest.pages
+    }
+    for path in changed + removed:
+        if path in manifest.files or (
+            path.startswith(dir_path_content)
+            and os.path.basename(path) == TEMPLATE_NAME
+        ):
+            # A shared input: only the pages recorded as reading it are
+            # rebuilt. A new section template also takes over the pages below.
+            affected = manifest.dependents(path)
+            if path not in manifest.files:
+                folder = os.path.join(os.path.dirname(path), "")
+                affected.update(
+                    from_path
+                    for from_path in manifest.pages
+                    if from_path.startswith(folder)
+                )
+            for from_path in affected:
+                pages[from_path] = manifest.pages[from_path]["output"]
+        elif path.startswith(dir_path_content):
+            dest_path = os.path.join(
+                dest_dir_path,
+                os.path.relpath(path, dir_path_content),
+            ).replace(".md", ".html")
+            if path in removed:
+                manifest.forget(path)
+                remove_output(dest_path, dest_dir_path)
+                if link_index is not None:
+                    link_index.discard(path)
+                    link_index.discard_output(dest_path, dest_dir_path)
+                continue
+            pages[path] = dest_path
         else:
-            generate_pages_recursive(
-                base_path,
-                from_path_obj,
-                template_path,
-                dest_path_obj,
+            rel_path = os.path.relpath(path, "./static/")
+            dest_path = os.path.join(dest_dir_path, rel_path)
+            if path in removed:
+                manifest.assets.discard(rel_path)
+                remove_output(dest_path, dest_dir_path)
+                if link_index is not None:
+                    link_index.discard_output(dest_path, dest_dir_path)
+                continue
+            sync_file(path, dest_path, stats, checksum, link_mode)
+            manifest.assets.add(rel_path)
+            if link_index is not None:
+                link_index.add_output(dest_path, dest_dir_path)
+
+    pages = sorted(pages.items())
+    dirty_pages = manifest.dirty_pages(
+        pages, inputs, page_dependencies(pages, templates)
+    )
+    dirty_pages, rewrap_pages = rewrap_clean_bodies(
+        dirty_pages, templates, manifest, options.body_store
+    )
+    if link_index is not None:
+        for _, dest_path in rewrap_pages:
+            link_index.add_output(dest_path, dest_dir_path)
+    make_dest_dirs(dirty_pages)
+    for from_path, dest_path in dirty_pages:
+        result = generate_page(
+            from_path, templates.for_page(from_path), dest_path, options
+        )
+        manifest.record(from_path, result.links, result.body, result.search)
+        if link_index is not None:
+            link_index.add(from_path, dest_path, result.links)
+            link_index.add_output(dest_path, dest_dir_path)
+    # Every render stores its body under a new name; drop the ones replaced.
+    prune_bodies(options.body_store, manifest)
+
+    if stats.copied or stats.linked:
+        print(f"Static assets: {stats}")
+
+
+def prune_bodies(body_store, manifest):
+    if body_store is not None:
+        body_store.prune({entry.get("body") for entry in manifest.pages.values()})
+
+
+def manifest_link_index(manifest):
+    link_index = LinkIndex()
+    for from_path, entry in manifest.pages.items():
+        link_index.add(from_path, entry["output"], entry["links"])
+    return link_index
+
+
+def write_search_index(manifest, dest_dir_path, base_path):
+    search_terms = manifest.search_terms
+    if not search_terms.changed and search_index_exists(dest_dir_path):
+        return
+    started = time.perf_counter()
+    for from_path in set(search_terms.pages) - set(manifest.pages):
+        search_terms.discard(from_path)
+    search_index = build_search_index(
+        manifest.pages, search_terms.pages, dest_dir_path, base_path
+    )
+    written, size = search_index.write(dest_dir_path, search_terms.digests)
+    if written:
+        search_terms.changed = True
+    elapsed = (time.perf_counter() - started) * 1000
+    print(
+        f"Search index: {search_index}, wrote {written} files of {size} bytes "
+        f"in {elapsed:.1f} ms"
+    )
+
+
+def update_search_index(search, manifest, dest_dir_path, base_path):
+    # Called before the manifest is saved, which also saves the page terms and
+    # the digests of the index files.
+    if search:
+        write_search_index(manifest, dest_dir_path, base_path)
+        return
+    # A build without --search-index must not keep publishing an old index.
+    manifest.search_terms.clear()
+    removed = remove_search_index(dest_dir_path)
+    if removed:
+        print(f"Removed the stale search index ({removed} files)")
+
+
+def report_broken_links(link_index, dest_dir_path):
+    broken = link_index.check(dest_dir_path)
+    for broken_link in broken:
+        print(broken_link)
+    print(f"Checked {len(link_index)} links: {len(broken)} broken")
+    return broken
+
+
+def remove_output(dest_path, dest_dir_path):
+    if os.path.isfile(dest_path):
+        print(f"Removing {dest_path}")
+        os.remove(dest_path)
+        remove_empty_folders(os.path.dirname(dest_path), dest_dir_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site.")
+    parser.add_argument(
+        "base_path",
+        nargs="?",
+        default="/",
+        help="path the site is served from (default: /)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes rendering pages, 0 for one per core",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static assets by content hash when their mtime differs",
+    )
+    parser.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="copy",
+        help="how changed static assets are placed in docs/ (default: copy)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every page per stage and report the slowest pages",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="number of slowest pages listed by --profile (default: 10)",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="also dump cProfile stats of the build to this pstats file",
+    )
+    parser.add_argument(
+        "--no-profile-allocations",
+        dest="profile_allocations",
+        action="store_false",
+        help="skip tracemalloc peak allocation tracking in --profile",
+    )
+    parser.add_argument(
+        "--no-fragment-cache",
+        dest="fragment_cache",
+        action="store_false",
+        help="render every block instead of reusing cached fragments",
+    )
+    parser.add_argument(
+        "--fragment-cache-size",
+        type=int,
+        default=512,
+        help="size cap in MiB of the on-disk fragment cache (default: 512)",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help="keep parsed pages in .cache/ to skip parsing when only the base "
+        "path or --search-index changes",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="also write a compressed search index of the pages to docs/search/",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="render only shard I of N of the pages into --shard-dir",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help="merge the outputs of N shards from --shard-dir into docs/",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        default=SHARD_DIR,
+        help=f"where shard outputs and manifests are kept (default: {SHARD_DIR})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve docs/ with live reload and rebuild pages as sources change",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="port of the --watch development server (default: 8888)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be >= 0")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.shard is not None and args.merge_shards is not None:
+        parser.error("--shard and --merge-shards are exclusive")
+    if args.merge_shards is not None and args.merge_shards < 1:
+        parser.error("--merge-shards must be positive")
+    if args.watch and (args.shard is not None or args.merge_shards is not None):
+        parser.error("--watch cannot be used with --shard or --merge-shards")
+    return args
+
+
+def open_caches(args):
+    version = generator_version()
+    fragment_cache = None
+    if args.fragment_cache:
+        fragment_cache = FragmentCache(
+            FRAGMENT_CACHE_PATH,
+            version,
+            max_disk_bytes=args.fragment_cache_size << 20,
+        )
+    parse_cache = None
+    if args.parse_cache:
+        parse_cache = ParseCache(PARSE_CACHE_PATH, version)
+    return fragment_cache, parse_cache
+
+
+def close_caches(fragment_cache, parse_cache, report=False):
+    if fragment_cache is not None:
+        fragment_cache.close()
+        if report:
+            print(
+                f"Fragment cache: {fragment_cache.hits} hits, "
+                f"{fragment_cache.misses} misses"
             )
+    if parse_cache is not None:
+        parse_cache.prune(PARSE_CACHE_MAX_BYTES)
+        if report:
+            print(f"Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses")
+
+
+def main_shard(args):
+    # Shards only render their pages: static assets, broken links and the
+    # site manifest are handled once by --merge-shards.
+    manifest = Manifest.load(shard_manifest_path(args.shard_dir, args.shard))
+    fragment_cache, parse_cache = open_caches(args)
+    generate_pages_recursive(
+        args.base_path,
+        "./content/",
+        "./template.html",
+        shard_dest_dir(args.shard_dir, args.shard),
+        manifest,
+        args.jobs,
+        options=BuildOptions(fragment_cache, parse_cache, search=args.search_index),
+        shard=args.shard,
+    )
+    manifest.save()
+    close_caches(fragment_cache, parse_cache)
+    index, count = args.shard
+    shard_path = shard_folder(args.shard_dir, args.shard)
+    print(f"Shard {index}/{count} written to {shard_path}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    base_path = args.base_path
+    if args.shard is not None:
+        return main_shard(args)
+
+    manifest = Manifest.load(MANIFEST_PATH)
+    stats, manifest.assets = sync_folder(
+        "./static/",
+        "./docs/",
+        manifest.assets,
+        args.checksum,
+        args.link,
+    )
+    if args.merge_shards is not None:
+        try:
+            merge_stats = merge_shards(
+                args.shard_dir,
+                args.merge_shards,
+                "./docs/",
+                manifest,
+                args.link,
+                args.search_index,
+            )
+        except ValueError as error:
+            raise SystemExit(error)
+        update_search_index(args.search_index, manifest, "./docs/", base_path)
+        manifest.save()
+        print(f"Merged {args.merge_shards} shards: {merge_stats}")
+        print(f"Static assets: {stats}")
+        report_broken_links(manifest_link_index(manifest), "./docs/")
+        return
+
+    profiler = None
+    if args.profile:
+        profiler = BuildProfiler(args.profile_allocations)
+        profiler.start()
+    c_profile = None
+    if args.profile_output:
+        c_profile = cProfile.Profile()
+        c_profile.enable()
+
+    fragment_cache, parse_cache = open_caches(args)
+    body_store = BodyStore(BODY_STORE_PATH)
+    options = BuildOptions(
+        fragment_cache,
+        parse_cache,
+        body_store,
+        args.search_index,
+        profiler is not None,
+    )
+    link_index = generate_pages_recursive(
+        base_path,
+        "./content/",
+        "./template.html",
+        "./docs/",
+        manifest,
+        args.jobs,
+        profiler,
+        options,
+    )
+    update_search_index(args.search_index, manifest, "./docs/", base_path)
+    manifest.save()
+    prune_bodies(body_store, manifest)
+    print(f"Static assets: {stats}")
+    report_broken_links(link_index, "./docs/")
+    # Worker processes keep their own counts, so only serial builds report.
+    close_caches(fragment_cache, parse_cache, report=args.jobs == 1)
 
+    if c_profile is not None:
+        c_profile.disable()
+        c_profile.dump_stats(args.profile_output)
+        print(f"cProfile stats written to {args.profile_output}")
+    if profiler is not None:
+        profiler.stop()
+        print(profiler.report(args.profile_top))
 
-def main():
-    reset_public_folder()
-    arg = sys.argv[0]
-    base_path = arg if arg != "" else "/"
-    generate_pages_recursive(base_path, "./content/", "./template.html", "./docs/")
+    if args.watch:
+        watch(
+            base_path,
+            "./content/",
+            "./template.html",
+            "./docs/",
+            manifest,
+            args.port,
+            args.checksum,
+            args.link,
+            options._replace(profile=False),
+        )
 
 
-main()
+if __name__ == "__main__":
+    main()
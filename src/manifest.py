@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+
+from search import SearchTerms, search_terms_path
+
+MANIFEST_VERSION = 4
+HASH_CHUNK_SIZE = 1 << 20
+# Optional entry fields recorded by a render and kept while the page is clean.
+RENDER_KEYS = ("body",)
+# Modules whose code decides what is rendered, cached or recorded for a page.
+# Tooling around the build (benchmarks, dev server, sharding, asset sync) is
+# left out so editing it keeps the built pages and caches.
+RENDER_MODULES = (
+    "blocks.py",
+    "bodies.py",
+    "fragment_cache.py",
+    "htmlnode.py",
+    "links.py",
+    "main.py",
+    "parse_cache.py",
+    "pipeline.py",
+    "render.py",
+    "search.py",
+    "split_nodes.py",
+    "template.py",
+    "textnode.py",
+)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def generator_version(src_dir: str = None) -> str:
+    # The generator's own sources are part of every page's inputs: editing the
+    # renderer must invalidate pages rendered by the previous version.
+    if src_dir is None:
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in RENDER_MODULES:
+        if not os.path.isfile(os.path.join(src_dir, name)):
+            continue
+        digest.update(name.encode())
+        digest.update(hash_file(os.path.join(src_dir, name)).encode())
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(
+        self,
+        path: str,
+        inputs: dict[str, str] = None,
+        pages: dict[str, dict] = None,
+        assets: list[str] = None,
+        files: dict[str, dict] = None,
+    ) -> None:
+        self.path = path
+        self.inputs = inputs if inputs is not None else {}
+        self.assets = set(assets) if assets is not None else set()
+        # Hashes of the files pages depend on besides their own source, such
+        # as templates.
+        self.files = files if files is not None else {}
+        self.search_terms = SearchTerms(search_terms_path(path))
+        # New records of changed files, with the pages still to be rendered
+        # against them. A record only moves to `files` once all of those pages
+        # are recorded, so a failed build leaves the rest marked as changed.
+        self._changed_files = {}
+        self.replace_pages(pages if pages is not None else {})
+        self._pending = {}
+        self.rewrappable = set()
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        try:
+            with open(path, "r") as manifest_file:
+                data = json.load(manifest_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(path)
+
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(
+            path, data["inputs"], data["pages"], data.get("assets"), data["files"]
+        )
+
+    def save(self) -> None:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "inputs": self.inputs,
+            "pages": self.pages,
+            "assets": sorted(self.assets),
+            "files": {
+                path: record
+                for path, record in self.files.items()
+                if self._dependents.get(path)
+            },
+        }
+        # Compact and in one piece: indent and json.dump() both fall back to
+        # the slow pure-Python encoding path.
+        text = json.dumps(data, separators=(",", ":"), sort_keys=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as manifest_file:
+            manifest_file.write(text)
+        os.replace(tmp_path, self.path)
+        self.search_terms.save()
+
+    def replace_pages(self, pages: dict[str, dict]) -> None:
+        self.pages = pages
+        self._dependents = {}
+        for from_path, entry in pages.items():
+            for path in entry.get("deps", ()):
+                self._dependents.setdefault(path, set()).add(from_path)
+
+    def dependents(self, path: str) -> set[str]:
+        return set(self._dependents.get(path, ()))
+
+    def stale_dependents(self) -> set[str]:
+        return set().union(*(pages for _, pages in self._changed_files.values()))
+
+    def changed_files(self, dependencies: dict[str, list[str]]) -> set[str]:
+        changed = set()
+        for path in {path for paths in dependencies.values() for path in paths}:
+            record = file_record(path, self.files.get(path))
+            pending = self._changed_files.get(path)
+            if pending is None and self.files.get(path) == record:
+                continue
+            changed.add(path)
+            if pending is None or pending[0] != record:
+                # Pages rendered against an earlier change are stale again.
+                self._changed_files[path] = (record, self.dependents(path))
+        for from_path, deps in dependencies.items():
+            for path in changed.intersection(deps):
+                self._changed_files[path][1].add(from_path)
+        return changed
+
+    def dirty_pages(
+        self,
+        pages: list[tuple[str, str]],
+        inputs: dict[str, str],
+        dependencies: dict[str, list[str]] = None,
+    ) -> list[tuple[str, str]]:
+        dependencies = dependencies if dependencies is not None else {}
+        full_rebuild = inputs != self.inputs
+        self.inputs = inputs
+        self.rewrappable = set()
+        changed_files = self.changed_files(dependencies)
+
+        dirty = []
+        for from_path, dest_path in pages:
+            entry = self.pages.get(from_path)
+            record = file_record(from_path, entry)
+            deps = dependencies.get(from_path, [])
+            self._pending[from_path] = dict(
+                record, output=dest_path, links=[], deps=deps
+            )
+            if (
+                entry is None
+                or entry["hash"] != record["hash"]
+                or entry["output"] != dest_path
+                or not os.path.isfile(dest_path)
+            ):
+                dirty.append((from_path, dest_path))
+                continue
+
+            # The page renders to the same body as last time: keep what was
+            # recorded from that render.
+            self._pending[from_path]["links"] = entry["links"]
+            for key in RENDER_KEYS:
+                if key in entry:
+                    self._pending[from_path][key] = entry[key]
+            if full_rebuild:
+                dirty.append((from_path, dest_path))
+            elif entry.get("deps") != deps or not changed_files.isdisjoint(deps):
+                # Only what the body is wrapped in changed.
+                dirty.append((from_path, dest_path))
+                if "body" in entry:
+                    self.rewrappable.add(from_path)
+            else:
+                self.record(from_path)
+
+        return dirty
+
+    def record(
+        self,
+        from_path: str,
+        links: list = None,
+        body: str = None,
+        search: tuple = None,
+    ) -> None:
+        entry = self._pending.pop(from_path)
+        self._remove(from_path)
+        self.pages[from_path] = entry
+        for path in entry["deps"]:
+            self._dependents.setdefault(path, set()).add(from_path)
+        if links is not None:
+            # The page was rendered again: everything recorded comes from that
+            # render.
+            entry["links"] = [list(link) for link in links]
+            for key in RENDER_KEYS:
+                entry.pop(key, None)
+            if body is not None:
+                entry["body"] = body
+            if search is not None:
+                self.search_terms.set(from_path, search)
+            else:
+                self.search_terms.discard(from_path)
+
+    def forget(self, from_path: str) -> dict:
+        self.search_terms.discard(from_path)
+        return self._remove(from_path)
+
+    def _remove(self, from_path: str) -> dict:
+        entry = self.pages.pop(from_path, None)
+        if entry is not None:
+            for path in entry.get("deps", ()):
+                self._dependents[path].discard(from_path)
+        for path, (record, pages) in list(self._changed_files.items()):
+            pages.discard(from_path)
+            if not pages:
+                self.files[path] = record
+                del self._changed_files[path]
+        return entry
+
+    def remove_stale_outputs(
+        self,
+        pages: list[tuple[str, str]],
+        dest_dir_path: str,
+    ) -> list[str]:
+        current = {from_path for from_path, _ in pages}
+        removed = []
+        for from_path in list(self.pages):
+            if from_path in current:
+                continue
+            dest_path = self.forget(from_path)["output"]
+            if os.path.isfile(dest_path):
+                os.remove(dest_path)
+                removed.append(dest_path)
+                remove_empty_folders(os.path.dirname(dest_path), dest_dir_path)
+        return removed
+
+
+def file_record(path: str, previous: dict = None) -> dict:
+    stat = os.stat(path)
+    if (
+        previous is not None
+        and previous["size"] == stat.st_size
+        and previous["mtime"] == stat.st_mtime_ns
+    ):
+        digest = previous["hash"]
+    else:
+        digest = hash_file(path)
+    return {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def remove_empty_folders(folder: str, root: str) -> None:
+    root = os.path.normpath(root)
+    folder = os.path.normpath(folder)
+    while folder != root and folder.startswith(root) and not os.listdir(folder):
+        os.rmdir(folder)
+        folder = os.path.dirname(folder)
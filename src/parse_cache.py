@@ -0,0 +1,160 @@
+import hashlib
+import marshal
+import os
+from typing import NamedTuple
+
+from blocks import BlockType, ParsedBlock
+from textnode import TextNode, TextType
+
+PARSE_CACHE_FORMAT = 2
+BLOCK_TYPES = tuple(BlockType)
+BLOCK_TYPE_IDS = {block_type: i for i, block_type in enumerate(BLOCK_TYPES)}
+TEXT_TYPES = tuple(TextType)
+TEXT_TYPE_IDS = {text_type: i for i, text_type in enumerate(TEXT_TYPES)}
+
+
+class ParsedPage(NamedTuple):
+    title: str
+    links: list[tuple[int, str]]
+    blocks: list[str]
+    parsed_blocks: list[ParsedBlock]
+    terms: list[str]
+
+
+def dump_page(page: ParsedPage) -> bytes:
+    # Enums are stored as small ints and TextNodes as plain tuples, which
+    # marshal writes far more compactly than pickle writes the objects.
+    parsed_blocks = [
+        (
+            BLOCK_TYPE_IDS[parsed.block_type],
+            parsed.tag,
+            [
+                [(node.text, TEXT_TYPE_IDS[node.text_type], node.url) for node in item]
+                for item in parsed.items
+            ],
+        )
+        for parsed in page.parsed_blocks
+    ]
+    return marshal.dumps(
+        (
+            PARSE_CACHE_FORMAT,
+            page.title,
+            page.links,
+            page.blocks,
+            parsed_blocks,
+            page.terms,
+        )
+    )
+
+
+def load_page(data: bytes) -> ParsedPage:
+    version, *fields = marshal.loads(data)
+    if version != PARSE_CACHE_FORMAT:
+        raise ValueError(f"unsupported parse cache format: {version}")
+    title, links, blocks, parsed_blocks, terms = fields
+    return ParsedPage(title, links, blocks, LazyParsedBlocks(parsed_blocks), terms)
+
+
+def load_parsed_block(raw) -> ParsedBlock:
+    block_type, tag, items = raw
+    return ParsedBlock(
+        BLOCK_TYPES[block_type],
+        tag,
+        [
+            [
+                TextNode(text, TEXT_TYPES[text_type], url)
+                for text, text_type, url in item
+            ]
+            for item in items
+        ],
+    )
+
+
+class LazyParsedBlocks:
+    # Blocks whose HTML comes from the fragment cache are never looked at, so
+    # their TextNodes are only built on first access.
+    __slots__ = ("raw", "_parsed")
+
+    def __init__(self, raw: list) -> None:
+        self.raw = raw
+        self._parsed = [None] * len(raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __getitem__(self, index: int) -> ParsedBlock:
+        parsed_block = self._parsed[index]
+        if parsed_block is None:
+            parsed_block = self._parsed[index] = load_parsed_block(self.raw[index])
+        return parsed_block
+
+
+class ParseCache:
+    def __init__(self, folder: str, version: str = "") -> None:
+        self.folder = folder
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source: str) -> str:
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(b"\0")
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.marshal")
+
+    def get(self, source: str) -> ParsedPage:
+        path = self.path(self.key(source))
+        try:
+            with open(path, "rb") as cache_file:
+                page = load_page(cache_file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        # Entries are pruned oldest first, so a hit marks the entry as fresh.
+        os.utime(path)
+        self.hits += 1
+        return page
+
+    def put(self, source: str, page: ParsedPage) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(self.key(source))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            cache_file.write(dump_page(page))
+        os.replace(tmp_path, path)
+
+    def prune(self, max_bytes: int) -> int:
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return 0
+
+        # Concurrent builds (e.g. shards) may prune the same folder at once.
+        entries = []
+        for name in names:
+            path = os.path.join(self.folder, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = 0
+        removed = 0
+        for _, size, path in sorted(entries, reverse=True):
+            total += size
+            if total > max_bytes:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
+
+    def __repr__(self) -> str:
+        return (
+            f"ParseCache(folder={self.folder}, hits={self.hits}, misses={self.misses})"
+        )
@@ -0,0 +1,86 @@
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+IO_THREADS = 8
+READ_AHEAD_LIMIT = 1 << 20
+
+
+def make_dest_dirs(pages: list[tuple[str, str]]) -> None:
+    folders = {os.path.dirname(dest_path) for _, dest_path in pages}
+    for folder in sorted(folders):
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+
+def read_source(from_path: str) -> str:
+    # Larger sources are left on disk and streamed by the renderer instead of
+    # being held in memory while they wait their turn.
+    if os.path.getsize(from_path) > READ_AHEAD_LIMIT:
+        return None
+    with open(from_path, "r") as from_file:
+        return from_file.read()
+
+
+def write_output(dest_path: str, chunks: list[str]) -> None:
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, "w") as dest_file:
+            dest_file.writelines(chunks)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class PagePipeline:
+    # Reads upcoming sources and writes finished pages on a thread pool so
+    # file I/O overlaps with rendering on the calling thread.
+    def __init__(self, pages: list[tuple[str, str]], threads: int = IO_THREADS):
+        self.pages = pages
+        self.threads = threads
+        self._executor = None
+        self._writes = deque()
+
+    def __enter__(self) -> "PagePipeline":
+        self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close(cancel=exc_type is not None)
+
+    def __iter__(self):
+        pages = iter(self.pages)
+        reads = deque(
+            self._read(from_path, dest_path)
+            for from_path, dest_path in itertools.islice(pages, self.threads * 2)
+        )
+        while reads:
+            from_path, dest_path, source = reads.popleft()
+            upcoming = next(pages, None)
+            if upcoming is not None:
+                reads.append(self._read(*upcoming))
+            yield from_path, dest_path, source.result()
+
+    def _read(self, from_path: str, dest_path: str):
+        return from_path, dest_path, self._executor.submit(read_source, from_path)
+
+    def write(self, dest_path: str, chunks: list[str]) -> None:
+        # Rendered pages wait in memory until written: once as many writes as
+        # reads are in flight, wait for the oldest before queueing another.
+        writes = self._writes
+        while writes and (writes[0].done() or len(writes) >= self.threads * 2):
+            writes.popleft().result()
+        writes.append(self._executor.submit(write_output, dest_path, chunks))
+
+    def close(self, cancel: bool = False) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+        self._executor = None
+        writes, self._writes = self._writes, deque()
+        if not cancel:
+            for write in writes:
+                write.result()
@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from manifest import file_record
+from render import render_page
+from template import Template, TemplateSet
+
+CACHE_MAX_BYTES = 64 << 20
+
+
+class RenderedPage(NamedTuple):
+    html: str
+    source: dict
+    template_path: str
+    template_hash: str
+    size: int
+
+
+class Site:
+    # Renders single pages on request for a long-running process, e.g. to
+    # preview drafts. Rendered pages are kept in an LRU bounded by the memory
+    # of their HTML and re-rendered once their source or template changes.
+    def __init__(
+        self,
+        content_dir: str,
+        template_path: str,
+        base_path: str = "/",
+        max_bytes: int = CACHE_MAX_BYTES,
+    ) -> None:
+        self.content_dir = os.path.normpath(content_dir)
+        self.base_path = base_path
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._template_set = TemplateSet(content_dir, template_path, base_path)
+        self._templates = {}
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def source_path(self, path: str) -> str:
+        # Accepts the page's URL below the site root, as written by the build:
+        # "/", "/blog/post/", "/blog/post/index.html" or "/notes.html".
+        rel_path = path.strip("/")
+        if rel_path.endswith(".html"):
+            candidates = [rel_path[: -len(".html")] + ".md"]
+        elif rel_path.endswith(".md"):
+            candidates = [rel_path]
+        else:
+            candidates = [os.path.join(rel_path, "index.md"), rel_path + ".md"]
+
+        for candidate in candidates:
+            from_path = os.path.normpath(os.path.join(self.content_dir, candidate))
+            common = os.path.commonpath([self.content_dir, from_path])
+            if common == self.content_dir and os.path.isfile(from_path):
+                return from_path
+        raise FileNotFoundError(f"No page for {path}")
+
+    def render(self, path: str) -> str:
+        from_path = self.source_path(path)
+        with self._lock:
+            cached = self._pages.get(from_path)
+        # A changed mtime or size only costs a hash of the source; the page is
+        # rendered again when the hash differs.
+        source = file_record(from_path, cached.source if cached else None)
+        template_path = self._template_set.find(os.path.dirname(from_path))
+        template, template_hash = self.template(template_path)
+        if (
+            cached is not None
+            and cached.source["hash"] == source["hash"]
+            and cached.template_path == template_path
+            and cached.template_hash == template_hash
+        ):
+            with self._lock:
+                self.hits += 1
+                if from_path in self._pages:
+                    self._pages[from_path] = cached._replace(source=source)
+                    self._pages.move_to_end(from_path)
+            return cached.html
+
+        chunks = []
+        with open(from_path, "r") as from_file:
+            render_page(from_file, template, chunks.append)
+        html = "".join(chunks)
+        page = RenderedPage(
+            html, source, template_path, template_hash, sys.getsizeof(html)
+        )
+        with self._lock:
+            self.misses += 1
+            self._store(from_path, page)
+        return html
+
+    def template(self, path: str) -> tuple[Template, str]:
+        with self._lock:
+            record, template = self._templates.get(path, (None, None))
+        new_record = file_record(path, record)
+        if record is None or record["hash"] != new_record["hash"]:
+            template = Template.from_file(path, self.base_path)
+        with self._lock:
+            self._templates[path] = (new_record, template)
+        return template, new_record["hash"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self._templates.clear()
+            self.size = 0
+
+    def _store(self, from_path: str, page: RenderedPage) -> None:
+        previous = self._pages.pop(from_path, None)
+        if previous is not None:
+            self.size -= previous.size
+        self._pages[from_path] = page
+        self.size += page.size
+        while self.size > self.max_bytes:
+            _, evicted = self._pages.popitem(last=False)
+            self.size -= evicted.size
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def __repr__(self) -> str:
+        return (
+            f"Site(content_dir={self.content_dir}, pages={len(self._pages)}, "
+            f"size={self.size}, hits={self.hits}, misses={self.misses})"
+        )
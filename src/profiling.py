@@ -0,0 +1,90 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+STAGES = (
+    "read",
+    "split",
+    "classify",
+    "inline",
+    "build",
+    "serialize",
+    "template",
+    "write",
+)
+
+
+class PageProfile:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.peak_bytes = dict.fromkeys(STAGES, 0)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    @contextmanager
+    def stage(self, name: str):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - start_bytes
+                self.peak_bytes[name] = max(self.peak_bytes[name], peak)
+
+    def __repr__(self) -> str:
+        return f"PageProfile(path={self.path}, total_seconds={self.total_seconds})"
+
+
+class BuildProfiler:
+    def __init__(self, track_allocations: bool = True) -> None:
+        self.track_allocations = track_allocations
+        self.pages = []
+
+    def start(self) -> None:
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        if self.track_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def add(self, page_profile: PageProfile) -> None:
+        self.pages.append(page_profile)
+
+    def stage_totals(self) -> dict[str, tuple[float, int]]:
+        return {
+            stage: (
+                sum(page.seconds[stage] for page in self.pages),
+                max((page.peak_bytes[stage] for page in self.pages), default=0),
+            )
+            for stage in STAGES
+        }
+
+    def report(self, top: int = 10) -> str:
+        lines = [f"Profiled {len(self.pages)} pages", ""]
+        lines.append(f"{'stage':<12}{'seconds':>12}{'share':>9}{'peak KiB':>12}")
+        totals = self.stage_totals()
+        total_seconds = sum(seconds for seconds, _ in totals.values()) or 1.0
+        for stage, (seconds, peak_bytes) in totals.items():
+            lines.append(
+                f"{stage:<12}{seconds:>12.4f}{seconds / total_seconds:>9.1%}"
+                f"{peak_bytes / 1024:>12.1f}"
+            )
+
+        lines.append("")
+        lines.append(f"Slowest {min(top, len(self.pages))} pages:")
+        slowest = sorted(self.pages, key=lambda page: page.total_seconds, reverse=True)
+        for page in slowest[:top]:
+            worst_stage = max(STAGES, key=lambda stage: page.seconds[stage])
+            lines.append(
+                f"{page.total_seconds:>10.4f}s  {page.path} (mostly {worst_stage})"
+            )
+        return "\n".join(lines)
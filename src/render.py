@@ -0,0 +1,97 @@
+import itertools
+from typing import NamedTuple
+
+from bodies import TeeContent
+from blocks import MarkdownStream, ParsedDocument, iter_numbered_blocks, parse_block
+from htmlnode import escape_html
+from links import collect_links
+from parse_cache import ParsedPage
+from profiling import PageProfile
+from search import collect_terms, page_terms
+
+STREAM_CHUNK_SIZE = 1 << 20
+
+
+class PageResult(NamedTuple):
+    links: list[tuple[int, str]]
+    profile: PageProfile = None
+    body: str = None
+    search: tuple[str, list[str]] = None
+
+
+def extract_title(markdown):
+    lines = markdown.split("\n")
+    title = lines[0]
+    if not title.startswith("# "):
+        raise Exception("No header")
+
+    title = title[2:].strip()
+    return title
+
+
+def stream_markdown(from_file, chunk_size=STREAM_CHUNK_SIZE):
+    chunks = iter(lambda: from_file.read(chunk_size), "")
+    head = ""
+    for chunk in chunks:
+        head += chunk
+        if "\n" in head:
+            break
+    return extract_title(head), iter_numbered_blocks(itertools.chain([head], chunks))
+
+
+def write_content(template, write, title, content, body_store):
+    body_writer = None
+    if body_store is not None:
+        body_writer = body_store.writer(title)
+        content = TeeContent(content, body_writer.write)
+    try:
+        template.write(write, Title=escape_html(title), Content=content)
+    except BaseException:
+        if body_writer is not None:
+            body_writer.discard()
+        raise
+    if body_writer is not None:
+        return body_writer.commit()
+    return None
+
+
+def render_page(
+    from_file, template, write, fragment_cache=None, body_store=None, search=False
+):
+    links = []
+    title, numbered_blocks = stream_markdown(from_file)
+    blocks = collect_links(numbered_blocks, links)
+    terms = set()
+    if search:
+        # The index needs the text nodes of every block, so blocks are parsed
+        # even where the fragment cache could have skipped them.
+        content = ParsedDocument(collect_terms(map(parse_block, blocks), terms))
+    elif fragment_cache is None:
+        content = MarkdownStream(blocks)
+    else:
+        content = fragment_cache.fragments(blocks)
+    body = write_content(template, write, title, content, body_store)
+    if search:
+        return PageResult(links, body=body, search=(title, sorted(terms)))
+    return PageResult(links, body=body)
+
+
+def parse_page(source, search=False):
+    links = []
+    blocks = list(collect_links(iter_numbered_blocks([source]), links))
+    parsed_blocks = [parse_block(block) for block in blocks]
+    terms = page_terms(parsed_blocks) if search else None
+    return ParsedPage(extract_title(source), links, blocks, parsed_blocks, terms)
+
+
+def render_parsed_page(
+    page, template, write, fragment_cache=None, body_store=None, search=False
+):
+    if fragment_cache is None:
+        content = ParsedDocument(page.parsed_blocks)
+    else:
+        content = fragment_cache.fragments(page.blocks, page.parsed_blocks)
+    body = write_content(template, write, page.title, content, body_store)
+    if search:
+        return PageResult(page.links, body=body, search=(page.title, page.terms))
+    return PageResult(page.links, body=body)
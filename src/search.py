@@ -0,0 +1,233 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import zlib
+
+SEARCH_INDEX_VERSION = 1
+SEARCH_INDEX_FOLDER = "search"
+TERMS_PER_SHARD = 4096
+GZIP_LEVEL = 6
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def collect_terms(parsed_blocks, terms):
+    # Taps the parsed blocks on their way to the renderer, the same way
+    # collect_links taps the raw blocks.
+    for parsed_block in parsed_blocks:
+        for text_nodes in parsed_block.items:
+            for text_node in text_nodes:
+                terms.update(TOKEN_PATTERN.findall(text_node.text.lower()))
+        yield parsed_block
+
+
+def page_terms(parsed_blocks) -> list[str]:
+    terms = set()
+    for _ in collect_terms(parsed_blocks, terms):
+        pass
+    return sorted(terms)
+
+
+def term_shard(term: str, shard_count: int) -> int:
+    # crc32 is cheap to reimplement in the browser to find a term's shard.
+    return zlib.crc32(term.encode()) % shard_count
+
+
+def page_url(dest_path: str, dest_dir_path: str, base_path: str) -> str:
+    rel_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return base_path
+    if rel_path.endswith("/index.html"):
+        return base_path + rel_path[: -len("index.html")]
+    return base_path + rel_path
+
+
+class SearchIndex:
+    def __init__(self) -> None:
+        self.pages = []
+        self.postings = {}
+
+    def add(self, url: str, title: str, terms: list[str]) -> None:
+        page_id = len(self.pages)
+        self.pages.append([url, title])
+        postings = self.postings
+        for term in terms:
+            page_ids = postings.get(term)
+            if page_ids is None:
+                postings[term] = [page_id]
+            else:
+                page_ids.append(page_id)
+
+    def shards(self) -> list[dict[str, list[int]]]:
+        shard_count = max(1, -(-len(self.postings) // TERMS_PER_SHARD))
+        shards = [{} for _ in range(shard_count)]
+        for term, page_ids in self.postings.items():
+            # Page ids are added in increasing order; gaps compress better.
+            if len(page_ids) > 1:
+                page_ids = [page_ids[0]] + [
+                    b - a for a, b in zip(page_ids, page_ids[1:])
+                ]
+            shards[term_shard(term, shard_count)][term] = page_ids
+        return shards
+
+    def write(self, dest_dir_path: str, digests: dict = None) -> tuple[int, int]:
+        # Files whose JSON matches the digest of the last write are left alone;
+        # `digests` is updated to describe the files now on disk.
+        digests = digests if digests is not None else {}
+        folder = os.path.join(dest_dir_path, SEARCH_INDEX_FOLDER)
+        os.makedirs(folder, exist_ok=True)
+        shards = self.shards()
+        files = {
+            "index.json.gz": {
+                "version": SEARCH_INDEX_VERSION,
+                "shards": len(shards),
+                "pages": self.pages,
+            }
+        }
+        for shard_id, shard in enumerate(shards):
+            files[f"terms-{shard_id}.json.gz"] = shard
+
+        for path in glob.glob(os.path.join(folder, "terms-*.json.gz")):
+            if os.path.basename(path) not in files:
+                os.remove(path)
+        for name in list(digests):
+            if name not in files:
+                del digests[name]
+        written = 0
+        size = 0
+        for name, data in files.items():
+            path = os.path.join(folder, name)
+            text = json.dumps(data, separators=(",", ":"), sort_keys=True)
+            digest = hashlib.sha256(text.encode()).hexdigest()
+            if digests.get(name) == digest and os.path.isfile(path):
+                continue
+            size += write_compressed_json(path, text)
+            digests[name] = digest
+            written += 1
+        return written, size
+
+    def __repr__(self) -> str:
+        return f"SearchIndex(pages={len(self.pages)}, terms={len(self.postings)})"
+
+
+def remove_search_index(dest_dir_path: str) -> int:
+    # Only the files the index writes: the folder may hold static assets too.
+    folder = os.path.join(dest_dir_path, SEARCH_INDEX_FOLDER)
+    paths = glob.glob(os.path.join(folder, "terms-*.json.gz"))
+    paths += glob.glob(os.path.join(folder, "index.json.gz"))
+    for path in paths:
+        os.remove(path)
+    if paths and not os.listdir(folder):
+        os.rmdir(folder)
+    return len(paths)
+
+
+def write_compressed_json(path: str, text: str) -> int:
+    # A fixed mtime keeps the output byte-identical between builds; level 6
+    # is gzip's own default and compresses several times faster than 9.
+    compressed = gzip.compress(text.encode(), GZIP_LEVEL, mtime=0)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as index_file:
+        index_file.write(compressed)
+    os.replace(tmp_path, path)
+    return len(compressed)
+
+
+def search_index_exists(dest_dir_path: str) -> bool:
+    return os.path.isfile(
+        os.path.join(dest_dir_path, SEARCH_INDEX_FOLDER, "index.json.gz")
+    )
+
+
+def build_search_index(
+    pages: dict[str, dict],
+    page_terms: dict[str, list],
+    dest_dir_path: str,
+    base_path: str,
+):
+    search_index = SearchIndex()
+    for from_path, entry in sorted(pages.items()):
+        title, terms = page_terms[from_path]
+        url = page_url(entry["output"], dest_dir_path, base_path)
+        search_index.add(url, title, terms)
+    return search_index
+
+
+def search_terms_path(manifest_path: str) -> str:
+    return f"{os.path.splitext(manifest_path)[0]}.search.json"
+
+
+class SearchTerms:
+    # The title and terms recorded for each page, and digests of the index
+    # files written from them. They are kept out of the manifest in a file of
+    # their own, read only by builds that render pages or write the index.
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.changed = False
+        self._pages = None
+        self._digests = None
+
+    @property
+    def pages(self) -> dict[str, list]:
+        if self._pages is None:
+            self._load()
+        return self._pages
+
+    @property
+    def digests(self) -> dict[str, str]:
+        if self._digests is None:
+            self._load()
+        return self._digests
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as terms_file:
+                data = json.load(terms_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") != SEARCH_INDEX_VERSION:
+            data = {}
+        self._pages = data.get("pages", {})
+        self._digests = data.get("digests", {})
+
+    def set(self, from_path: str, search: tuple[str, list[str]]) -> None:
+        self.pages[from_path] = list(search)
+        self.changed = True
+
+    def discard(self, from_path: str) -> None:
+        if self._pages is None and not os.path.exists(self.path):
+            return
+        if self.pages.pop(from_path, None) is not None:
+            self.changed = True
+
+    def replace(self, pages: dict[str, list]) -> None:
+        if self._digests is None:
+            self._load()
+        self._pages = pages
+        self.changed = True
+
+    def clear(self) -> None:
+        self._pages = {}
+        self._digests = {}
+        self.changed = True
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+        self.changed = False
+        if not self.pages and not self.digests:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        data = {
+            "version": SEARCH_INDEX_VERSION,
+            "pages": self.pages,
+            "digests": self.digests,
+        }
+        text = json.dumps(data, separators=(",", ":"), sort_keys=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as terms_file:
+            terms_file.write(text)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,119 @@
+import argparse
+import hashlib
+import os
+
+from manifest import Manifest, remove_empty_folders
+from sync import SyncStats, sync_file
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {value} is out of range")
+    return index, count
+
+
+def shard_of(rel_path: str, count: int) -> int:
+    # A stable hash of the path relative to the content folder: every machine
+    # must agree on the partition whatever its checkout location or PYTHONHASHSEED.
+    digest = hashlib.sha256(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def shard_pages(
+    pages: list[tuple[str, str]],
+    dir_path_content: str,
+    shard: tuple[int, int],
+) -> list[tuple[str, str]]:
+    index, count = shard
+    return [
+        (from_path, dest_path)
+        for from_path, dest_path in pages
+        if shard_of(os.path.relpath(from_path, dir_path_content), count) == index
+    ]
+
+
+def shard_folder(shard_dir: str, shard: tuple[int, int]) -> str:
+    index, count = shard
+    return os.path.join(shard_dir, f"{index}-of-{count}")
+
+
+def shard_manifest_path(shard_dir: str, shard: tuple[int, int]) -> str:
+    return os.path.join(shard_folder(shard_dir, shard), "manifest.json")
+
+
+def shard_dest_dir(shard_dir: str, shard: tuple[int, int]) -> str:
+    return os.path.join(shard_folder(shard_dir, shard), "docs")
+
+
+def merge_shards(
+    shard_dir: str,
+    count: int,
+    dest_dir_path: str,
+    manifest: Manifest,
+    link_mode: str = "copy",
+    search: bool = False,
+) -> SyncStats:
+    shards = []
+    for index in range(1, count + 1):
+        path = shard_manifest_path(shard_dir, (index, count))
+        if not os.path.isfile(path):
+            raise ValueError(f"Missing shard {index}/{count}: no {path}")
+        shards.append((index, Manifest.load(path)))
+
+    conflicts = []
+    inputs = shards[0][1].inputs
+    files = {}
+    for index, shard_manifest in shards:
+        if shard_manifest.inputs != inputs:
+            conflicts.append(f"shard {index}/{count} was built with other inputs")
+        for path, record in shard_manifest.files.items():
+            if path in files and files[path]["hash"] != record["hash"]:
+                conflicts.append(f"shard {index}/{count} was built with another {path}")
+            files.setdefault(path, record)
+    if search and "search_index" not in inputs:
+        conflicts.append("shards were built without --search-index")
+
+    pages = {}
+    owners = {}
+    search_terms = {}
+    for index, shard_manifest in shards:
+        shard_dest = shard_dest_dir(shard_dir, (index, count))
+        search_terms.update(shard_manifest.search_terms.pages)
+        for from_path, entry in shard_manifest.pages.items():
+            rel_path = os.path.relpath(entry["output"], shard_dest)
+            for key in (from_path, rel_path):
+                if key in owners and owners[key] != index:
+                    conflicts.append(
+                        f"{key} is in shard {owners[key]}/{count} "
+                        f"and shard {index}/{count}"
+                    )
+                owners[key] = index
+            pages[from_path] = (os.path.join(shard_dest, rel_path), rel_path, entry)
+    if conflicts:
+        raise ValueError("Cannot merge shards:\n" + "\n".join(conflicts))
+
+    stats = SyncStats()
+    merged = {}
+    for from_path, (shard_output, rel_path, entry) in sorted(pages.items()):
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        sync_file(shard_output, dest_path, stats, True, link_mode)
+        merged[from_path] = dict(entry, output=dest_path)
+        # Stored bodies stay with the machine that rendered them.
+        merged[from_path].pop("body", None)
+
+    for from_path, entry in manifest.pages.items():
+        if from_path not in merged and os.path.isfile(entry["output"]):
+            os.remove(entry["output"])
+            remove_empty_folders(os.path.dirname(entry["output"]), dest_dir_path)
+            stats.removed += 1
+    manifest.inputs = inputs
+    manifest.files = files
+    manifest.replace_pages(merged)
+    manifest.search_terms.replace(
+        {path: terms for path, terms in search_terms.items() if path in merged}
+    )
+    return stats
@@ -1,5 +1,4 @@
 import re
-from collections.abc import Callable
 
 from textnode import TextNode, TextType
 
@@ -9,6 +8,13 @@ MATCHING_DELIMITER = {
     "`": TextType.CODE,
 }
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_OR_IMAGE_PATTERN = re.compile(r"(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_MARKER_PATTERN = re.compile(r"`|\*\*|_|!\[|\[")
+# Matches from the "[" of a link or an image.
+BRACKET_SPAN_PATTERN = re.compile(r"\[[^\[\]]*\]\([^\(\)]*\)")
+
 
 def split_nodes_delimiter(
     old_nodes: list[TextNode],
@@ -42,67 +48,167 @@ def split_nodes_delimiter(
 
 
 def extract_markdown_images(text: str) -> tuple[str, str]:
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> tuple[str, str]:
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
-def split_nodes_image(old_nodes: list[TextNode]):
-    return split_nodes_with_extract_func(
-        old_nodes,
-        extract_markdown_images,
-        "![{}]({})",
-        TextType.IMAGE,
-    )
+def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
+    return split_nodes_with_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
 
-def split_nodes_link(old_nodes: list[TextNode]):
-    return split_nodes_with_extract_func(
-        old_nodes,
-        extract_markdown_links,
-        "[{}]({})",
-        TextType.LINK,
-    )
+def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+    return split_nodes_with_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
 
-def split_nodes_with_extract_func(
+def split_nodes_with_pattern(
     old_nodes: list[TextNode],
-    extract_func: Callable,
-    match_string: str,
+    pattern: re.Pattern,
     text_type: TextType,
 ) -> list[TextNode]:
     nodes_list = []
     for _node in old_nodes:
-        original_text = _node.text
-        matches = extract_func(original_text)
-        if not matches:
+        if _node.text_type != TextType.TEXT:
             nodes_list.append(_node)
             continue
 
-        for text, link in matches:
-            sections = original_text.split(
-                match_string.format(text, link),
-                1,
+        original_text = _node.text
+        start = 0
+        for span_match in pattern.finditer(original_text):
+            if start < span_match.start():
+                nodes_list.append(
+                    TextNode(original_text[start : span_match.start()], TextType.TEXT)
+                )
+            nodes_list.append(
+                TextNode(span_match.group(1), text_type, span_match.group(2))
             )
-            if sections[0] != "":
-                nodes_list.append(TextNode(sections[0], TextType.TEXT))
-            nodes_list.append(TextNode(text, text_type, link))
-            original_text = sections[-1]
-        else:
-            if original_text != "":
-                nodes_list.append(TextNode(original_text, TextType.TEXT))
+            start = span_match.end()
+
+        if start == 0:
+            nodes_list.append(_node)
+        elif start < len(original_text):
+            nodes_list.append(TextNode(original_text[start:], TextType.TEXT))
 
     return nodes_list
 
 
-def text_to_textnodes(text: str):
-    nodes = [TextNode(text, TextType.TEXT)]
+def append_text_with_links(
+    nodes_list: list[TextNode],
+    text: str,
+    text_type: TextType,
+) -> None:
+    start = 0
+    for span_match in LINK_OR_IMAGE_PATTERN.finditer(text):
+        if start < span_match.start():
+            nodes_list.append(TextNode(text[start : span_match.start()], text_type))
+        span_type = TextType.IMAGE if span_match.group(1) else TextType.LINK
+        nodes_list.append(TextNode(span_match.group(2), span_type, span_match.group(3)))
+        start = span_match.end()
+    if start < len(text):
+        nodes_list.append(TextNode(text[start:], text_type))
+
+
+def find_closing_delimiter(text: str, marker: str, position: int) -> int:
+    # Complete links and images are skipped: a delimiter in a link's text or
+    # url never closes a span opened before the link.
+    while True:
+        end = text.find(marker, position)
+        if end == -1:
+            return -1
+        bracket = text.find("[", position, end)
+        if bracket == -1:
+            return end
+        span_match = BRACKET_SPAN_PATTERN.match(text, bracket)
+        position = bracket + 1 if span_match is None else span_match.end()
+
+
+def iter_link_matches(text: str):
+    # The link and image matches text_to_textnodes turns into nodes, found
+    # with the same scan without building any node: links in code spans are
+    # skipped, links in bold or italic spans are kept.
+    position = 0
+    while True:
+        marker_match = INLINE_MARKER_PATTERN.search(text, position)
+        if marker_match is None:
+            return
+
+        marker = marker_match.group()
+        start = marker_match.start()
+        if marker == "`":
+            end = text.find(marker, start + 1)
+        elif marker in MATCHING_DELIMITER:
+            end = find_closing_delimiter(text, marker, start + len(marker))
+            if end != -1:
+                yield from LINK_OR_IMAGE_PATTERN.finditer(
+                    text, start + len(marker), end
+                )
+        else:
+            span_match = LINK_OR_IMAGE_PATTERN.match(text, start)
+            if span_match is None:
+                position = start + 1
+                continue
+            yield span_match
+            position = span_match.end()
+            continue
 
-    for delimiter in ["`", "**", "_"]:
-        nodes = split_nodes_delimiter(nodes, delimiter)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+        if end == -1:
+            return
+        position = end + len(marker)
 
-    return nodes
+
+def text_to_textnodes(text: str) -> list[TextNode]:
+    # Single left-to-right scan: the first marker found opens a span that
+    # runs to its closing marker. Code spans are literal, links and images
+    # nested in bold or italic spans are still extracted, and delimiters
+    # inside link texts or urls don't break the link. TextNode is flat, so
+    # emphasis inside a link's text is not supported: the text of
+    # [**a**](/x) keeps its ** literally.
+    nodes_list = []
+    text_start = 0
+    position = 0
+    while True:
+        marker_match = INLINE_MARKER_PATTERN.search(text, position)
+        if marker_match is None:
+            break
+
+        marker = marker_match.group()
+        start = marker_match.start()
+        if marker in MATCHING_DELIMITER:
+            if marker == "`":
+                end = text.find(marker, start + 1)
+            else:
+                end = find_closing_delimiter(text, marker, start + len(marker))
+            if end == -1:
+                raise Exception("Unclosing delimiter issue.")
+            if text_start < start:
+                nodes_list.append(TextNode(text[text_start:start], TextType.TEXT))
+            inner_text = text[start + len(marker) : end]
+            if marker == "`":
+                if inner_text != "":
+                    nodes_list.append(TextNode(inner_text, TextType.CODE))
+            else:
+                append_text_with_links(
+                    nodes_list, inner_text, MATCHING_DELIMITER[marker]
+                )
+            position = text_start = end + len(marker)
+            continue
+
+        if marker == "![":
+            pattern, text_type = IMAGE_PATTERN, TextType.IMAGE
+        else:
+            pattern, text_type = LINK_PATTERN, TextType.LINK
+        span_match = pattern.match(text, start)
+        if span_match is None:
+            position = start + 1
+            continue
+
+        if text_start < start:
+            nodes_list.append(TextNode(text[text_start:start], TextType.TEXT))
+        nodes_list.append(TextNode(span_match.group(1), text_type, span_match.group(2)))
+        position = text_start = span_match.end()
+
+    if text_start < len(text):
+        nodes_list.append(TextNode(text[text_start:], TextType.TEXT))
+    return nodes_list
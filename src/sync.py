@@ -0,0 +1,127 @@
+import errno
+import os
+import shutil
+
+from manifest import hash_file, remove_empty_folders
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LINK_MODES = ("copy", "hardlink", "reflink")
+FICLONE = 0x40049409
+LINK_FALLBACK_ERRORS = (errno.EXDEV, errno.EPERM, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+class SyncStats:
+    def __init__(self) -> None:
+        self.copied = 0
+        self.linked = 0
+        self.skipped = 0
+        self.removed = 0
+        self.bytes_written = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.copied} copied ({self.bytes_written} bytes), "
+            f"{self.linked} linked, {self.skipped} unchanged, {self.removed} removed"
+        )
+
+
+def sync_folder(
+    src_dir: str,
+    dest_dir: str,
+    previous: set[str] = None,
+    checksum: bool = False,
+    link_mode: str = "copy",
+) -> tuple[SyncStats, set[str]]:
+    stats = SyncStats()
+    synced = set()
+    for dir_path, _, file_names in os.walk(src_dir):
+        for file_name in sorted(file_names):
+            src_path = os.path.join(dir_path, file_name)
+            rel_path = os.path.relpath(src_path, src_dir)
+            dest_path = os.path.join(dest_dir, rel_path)
+            sync_file(src_path, dest_path, stats, checksum, link_mode)
+            synced.add(rel_path)
+
+    for rel_path in sorted((previous or set()) - synced):
+        dest_path = os.path.join(dest_dir, rel_path)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            remove_empty_folders(os.path.dirname(dest_path), dest_dir)
+            stats.removed += 1
+
+    return stats, synced
+
+
+def sync_file(
+    src_path: str,
+    dest_path: str,
+    stats: SyncStats,
+    checksum: bool = False,
+    link_mode: str = "copy",
+) -> None:
+    src_stat = os.stat(src_path)
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        dest_stat = None
+
+    if dest_stat is not None and dest_stat.st_size == src_stat.st_size:
+        if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            stats.skipped += 1
+            return
+        if checksum and hash_file(src_path) == hash_file(dest_path):
+            os.utime(dest_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+            stats.skipped += 1
+            return
+
+    dest_folder = os.path.dirname(dest_path)
+    if dest_folder:
+        os.makedirs(dest_folder, exist_ok=True)
+    if dest_stat is not None:
+        os.remove(dest_path)
+
+    if link_mode == "hardlink" and try_hardlink(src_path, dest_path):
+        stats.linked += 1
+        return
+    if link_mode == "reflink" and try_reflink(src_path, dest_path):
+        stats.linked += 1
+        return
+
+    shutil.copy2(src_path, dest_path)
+    stats.copied += 1
+    stats.bytes_written += src_stat.st_size
+
+
+def try_hardlink(src_path: str, dest_path: str) -> bool:
+    try:
+        os.link(src_path, dest_path)
+    except OSError as error:
+        if error.errno in LINK_FALLBACK_ERRORS:
+            return False
+        raise
+    return True
+
+
+def try_reflink(src_path: str, dest_path: str) -> bool:
+    if fcntl is None:
+        return False
+
+    with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+        except OSError as error:
+            if error.errno not in LINK_FALLBACK_ERRORS + (errno.ENOTTY,):
+                raise
+            cloned = False
+        else:
+            cloned = True
+
+    if not cloned:
+        os.remove(dest_path)
+        return False
+    shutil.copystat(src_path, dest_path)
+    return True
@@ -0,0 +1,100 @@
+import os
+import re
+
+from htmlnode import URL_PROPS, rebase_url
+
+TEMPLATE_NAME = "template.html"
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(
+    r"""(\s(?:{})=")([^"]*)(")""".format("|".join(URL_PROPS))
+)
+
+
+class Template:
+    def __init__(self, source: str, base_path: str = "/", path: str = None) -> None:
+        self.path = path
+        self.base_path = base_path
+
+        source = URL_ATTRIBUTE_PATTERN.sub(
+            lambda match: match.group(1)
+            + rebase_url(base_path, match.group(2))
+            + match.group(3),
+            source,
+        )
+
+        # literals[i] is written before slots[i], literals[-1] closes the page.
+        self.literals = []
+        self.slots = []
+        start = 0
+        for slot_match in SLOT_PATTERN.finditer(source):
+            self.literals.append(source[start : slot_match.start()])
+            self.slots.append(slot_match.group(1))
+            start = slot_match.end()
+        self.literals.append(source[start:])
+
+    @classmethod
+    def from_file(cls, path: str, base_path: str = "/") -> "Template":
+        with open(path, "r") as template_file:
+            return cls(template_file.read(), base_path, path)
+
+    def render(self, **values) -> str:
+        chunks = []
+        self.write(chunks.append, **values)
+        return "".join(chunks)
+
+    def write(self, write, **values) -> None:
+        write(self.literals[0])
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            if slot not in values:
+                raise ValueError(f"Missing value for template slot {slot}.")
+            value = values[slot]
+            if isinstance(value, str):
+                write(value)
+            else:
+                value.write_html(write, self.base_path)
+            write(literal)
+
+    def __repr__(self) -> str:
+        return f"Template(path={self.path}, slots={self.slots})"
+
+
+class TemplateSet:
+    # The nearest template.html above a page wraps it, falling back to the
+    # default template. Lookups are memoized per folder and each template file
+    # is compiled once, however many pages share it.
+    def __init__(self, root: str, default_path: str, base_path: str = "/") -> None:
+        self.root = os.path.normpath(root)
+        self.default_path = default_path
+        self.base_path = base_path
+        self.templates = {}
+        self._folders = {}
+
+    def for_page(self, from_path: str) -> Template:
+        return self.for_folder(os.path.dirname(from_path))
+
+    def for_folder(self, folder: str) -> Template:
+        template = self._folders.get(folder)
+        if template is None:
+            template = self._folders[folder] = self.load(self.find(folder))
+        return template
+
+    def find(self, folder: str) -> str:
+        # Unlike for_folder, looks at the file system on every call.
+        while True:
+            path = os.path.join(folder, TEMPLATE_NAME)
+            parent = os.path.dirname(folder.rstrip(os.sep))
+            if os.path.isfile(path):
+                return path
+            if os.path.normpath(folder) == self.root or parent == folder:
+                return self.default_path
+            folder = parent
+
+    def load(self, path: str) -> Template:
+        template = self.templates.get(path)
+        if template is None:
+            template = Template.from_file(path, self.base_path)
+            self.templates[path] = template
+        return template
+
+    def __repr__(self) -> str:
+        return f"TemplateSet(root={self.root}, templates={list(self.templates)})"
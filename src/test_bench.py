@@ -0,0 +1,49 @@
+import os
+import random
+import unittest
+
+from bench import SHAPES, generate_corpus, generate_markdown, run_benchmarks
+from blocks import markdown_to_html_node
+from test_support import TempDirTestCase
+
+
+class TestCorpus(TempDirTestCase):
+    def test_generate_markdown_is_deterministic(self):
+        first = generate_markdown(random.Random(3), "mixed", 10, 5)
+        second = generate_markdown(random.Random(3), "mixed", 10, 5)
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith("# "))
+
+    def test_every_shape_renders(self):
+        for shape in SHAPES:
+            markdown = generate_markdown(random.Random(0), shape, 10, 5)
+            html = markdown_to_html_node(markdown).to_html()
+            self.assertTrue(html.startswith("<div><h1>"), shape)
+
+    def test_generate_corpus(self):
+        paths = generate_corpus(self.root, 12, "links", 3, 4)
+        self.assertEqual(len(paths), 12)
+        self.assertTrue(all(os.path.isfile(path) for path in paths))
+
+
+class TestRunBenchmarks(unittest.TestCase):
+    def test_report(self):
+        report = run_benchmarks("mixed", pages=3, blocks=4, block_size=3, repeat=1)
+        self.assertEqual(
+            set(report["stages"]),
+            {
+                "markdown_to_blocks",
+                "block_to_block_type",
+                "text_to_textnodes",
+                "escape_html",
+                "to_html",
+                "compact_to_html",
+                "generate_pages_recursive",
+            },
+        )
+        self.assertEqual(report["stages"]["generate_pages_recursive"]["items"], 3)
+        self.assertEqual(report["corpus"]["pages"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
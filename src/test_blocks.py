@@ -2,7 +2,10 @@ import unittest
 
 from blocks import (
     BlockType,
+    MarkdownStream,
     block_to_block_type,
+    iter_blocks,
+    iter_numbered_blocks,
     markdown_to_blocks,
     markdown_to_html_node,
 )
@@ -52,6 +55,19 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        md = "\n# Title\n\n\n\npara one\nline two\n\n\n- a\n- b\n\n   \n\nend\n"
+        for size in range(1, len(md) + 1):
+            chunks = [md[i : i + size] for i in range(0, len(md), size)]
+            self.assertEqual(list(iter_blocks(chunks)), markdown_to_blocks(md))
+
+    def test_iter_numbered_blocks(self):
+        md = "\n# Title\n\n\n\npara one\nline two\n\n  \n- a\n- b\n"
+        self.assertEqual(
+            list(iter_numbered_blocks([md[:7], md[7:12], md[12:]])),
+            [(2, "# Title"), (6, "para one\nline two"), (10, "- a\n- b")],
+        )
+
     def test_block_to_block_type_code(self):
         text = "```\ncode block\n```"
         self.assertEqual(block_to_block_type(text), BlockType.CODE)
@@ -67,17 +83,29 @@ This is the same paragraph on a new line
 
     def test_block_to_block_type_quote(self):
         self.assertEqual(block_to_block_type("> h1\n> n"), BlockType.QUOTE)
+        self.assertEqual(block_to_block_type("> h1\n>\n> n"), BlockType.QUOTE)
 
     def test_block_to_block_type_unordered_list(self):
         self.assertEqual(
-            block_to_block_type("- list\n - list"), BlockType.UNORDERED_LIST
+            block_to_block_type("- list\n- list"), BlockType.UNORDERED_LIST
         )
 
     def test_block_to_block_type_ordered_list(self):
         self.assertEqual(
-            block_to_block_type("1. list\n 2. list"), BlockType.ORDERED_LIST
+            block_to_block_type("1. list\n2. list"), BlockType.ORDERED_LIST
         )
 
+    def test_block_to_block_type_checks_every_line(self):
+        self.assertEqual(block_to_block_type("> quote\nnot"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("- list\n - list"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("1. list\n3. list"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("# h1\ntext"), BlockType.PARAGRAPH)
+
+    def test_block_to_block_type_indented(self):
+        self.assertEqual(block_to_block_type("\n# h1"), BlockType.HEADING)
+        self.assertEqual(block_to_block_type("  ```\ncode\n```"), BlockType.CODE)
+        self.assertEqual(block_to_block_type(" - list"), BlockType.PARAGRAPH)
+
     def test_block_to_block_type_error_paragraph(self):
         self.assertEqual(block_to_block_type("``"), BlockType.PARAGRAPH)
         self.assertEqual(block_to_block_type(">list"), BlockType.PARAGRAPH)
@@ -167,6 +195,13 @@ this is paragraph text
             "<div><blockquote>This is a blockquote block</blockquote><p>this is paragraph text</p></div>",
         )
 
+    def test_markdown_stream(self):
+        md = "# Title\n\nSome [link](/a) and **bold**\n\n- one\n- two"
+        self.assertEqual(
+            MarkdownStream(iter_blocks([md])).to_html("/site/"),
+            markdown_to_html_node(md).to_html("/site/"),
+        )
+
     def test_code(self):
         md = """
 ```
@@ -181,3 +216,11 @@ the **same** even with inline stuff
             html,
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
+
+    def test_code_is_escaped(self):
+        md = "```\nif (a < b && c > d) {}\n```\n\nTom & Jerry <3"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>if (a &lt; b &amp;&amp; c &gt; d) {}\n</code></pre>"
+            "<p>Tom &amp; Jerry &lt;3</p></div>",
+        )
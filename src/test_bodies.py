@@ -0,0 +1,55 @@
+import io
+import os
+import unittest
+
+from bodies import BodyStore, TeeContent, read_stored_page
+from htmlnode import LeafNode
+from test_support import TempDirTestCase
+
+
+class TestBodyStore(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = BodyStore(os.path.join(self.root, "bodies"))
+
+    def test_write_and_read(self):
+        writer = self.store.writer("Title")
+        writer.write("<div>")
+        writer.write("</div>")
+        name = writer.commit()
+        self.assertTrue(self.store.exists(name))
+
+        with open(self.store.path(name)) as body_file:
+            title, body = read_stored_page(body_file)
+            chunks = []
+            body.write_html(chunks.append)
+        self.assertEqual(title, "Title")
+        self.assertEqual("".join(chunks), "<div></div>")
+
+    def test_discard(self):
+        writer = self.store.writer("Title")
+        writer.discard()
+        self.assertEqual(os.listdir(self.store.folder), [])
+        self.assertFalse(self.store.exists(None))
+
+    def test_prune(self):
+        names = []
+        for title in ("a", "b"):
+            writer = self.store.writer(title)
+            names.append(writer.commit())
+        self.assertEqual(self.store.prune({names[0]}), 1)
+        self.assertTrue(self.store.exists(names[0]))
+        self.assertFalse(self.store.exists(names[1]))
+
+    def test_tee_content(self):
+        page = io.StringIO()
+        body = io.StringIO()
+        TeeContent(LeafNode("a", "home", {"href": "/"}), body.write).write_html(
+            page.write, "/site/"
+        )
+        self.assertEqual(page.getvalue(), '<a href="/site/">home</a>')
+        self.assertEqual(body.getvalue(), page.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from blocks import markdown_to_html_node
+from compact import CompactDocument
+from htmlnode import LeafNode, ParentNode
+
+MARKDOWN = """
+# Tolkien Fan Club
+
+![JRR Tolkien sitting](/images/tolkien.png)
+
+Here's the deal, **I like Tolkien**, see [my posts](/blog/tom).
+
+> "I am in fact a Hobbit"
+> -- J.R.R. Tolkien
+
+- one
+- _two_
+
+1. first
+2. `second`
+
+```
+func main(){
+    fmt.Println("Aiya, Ambar!")
+}
+```
+
+Escaped: a < b & [c > d](/search?q=1&page=2)
+"""
+
+
+class TestCompactDocument(unittest.TestCase):
+    def test_from_markdown_matches_html_node(self):
+        document = CompactDocument.from_markdown(MARKDOWN)
+        html_node = markdown_to_html_node(MARKDOWN)
+        self.assertEqual(document.to_html(), html_node.to_html())
+        self.assertEqual(document.to_html("/site/"), html_node.to_html("/site/"))
+
+    def test_from_node(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "a "), LeafNode("b", "bold")]),
+                ParentNode("ul", []),
+                LeafNode("a", "link", {"href": "/x"}),
+                LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+            ],
+            {"class": "page"},
+        )
+        document = CompactDocument.from_node(node)
+        self.assertEqual(len(document), 7)
+        self.assertIn(
+            '<img src="/site/a.png" alt="a" /></div>', document.to_html("/site/")
+        )
+        self.assertEqual(document.to_html("/site/"), node.to_html("/site/"))
+
+    def test_shared_text_buffer(self):
+        document = CompactDocument.from_node(
+            ParentNode("p", [LeafNode(None, "ab"), LeafNode("b", "cd")])
+        )
+        document.to_html()
+        self.assertEqual(document.buffer, "abcd")
+        self.assertEqual(list(document.text_starts), [0, 0, 2])
+        self.assertEqual(list(document.text_ends), [0, 2, 4])
+        self.assertEqual(list(document.subtree_ends), [3, 2, 3])
+        self.assertEqual(document.tag_names, [None, "p", "b"])
+
+    def test_write_html_streams(self):
+        document = CompactDocument.from_markdown("- a\n- b")
+        chunks = []
+        document.write_html(chunks.append)
+        self.assertEqual("".join(chunks), "<div><ul><li>a</li><li>b</li></ul></div>")
+
+    def test_invalid_nodes(self):
+        with self.assertRaisesRegex(ValueError, "All leaf nodes must have a value."):
+            CompactDocument.from_node(LeafNode("b", None))
+        with self.assertRaisesRegex(ValueError, "All parent nodes must have a tag."):
+            CompactDocument.from_node(ParentNode(None, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import unittest
+from urllib.request import urlopen
+
+from devserver import (
+    LIVE_RELOAD_PATH,
+    LiveReloadServer,
+    diff_snapshots,
+    snapshot_files,
+)
+from test_support import TempDirTestCase
+
+
+class TestSnapshots(TempDirTestCase):
+    def test_snapshot_files_and_folders(self):
+        page = self.write("content/blog/index.md", "# blog")
+        template = self.write("template.html", "{{ Content }}")
+        snapshot = snapshot_files([os.path.join(self.root, "content"), template])
+        self.assertEqual(sorted(snapshot), sorted([page, template]))
+
+    def test_diff_snapshots(self):
+        old_snapshot = {"a.md": 1, "b.md": 1, "c.md": 1}
+        new_snapshot = {"a.md": 1, "b.md": 2, "d.md": 1}
+        self.assertEqual(
+            diff_snapshots(old_snapshot, new_snapshot),
+            (["b.md", "d.md"], ["c.md"]),
+        )
+
+
+class TestLiveReloadServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("index.html", "<html><body><p>hello</p></body></html>")
+        self.write("index.css", "body {}")
+        self.server = LiveReloadServer(self.root, 0)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        super().tearDown()
+
+    def get(self, path):
+        with urlopen(self.server.url + path.lstrip("/")) as response:
+            return response.read().decode()
+
+    def test_injects_live_reload_script(self):
+        html = self.get("/")
+        self.assertIn("<p>hello</p><script>", html)
+        self.assertIn(LIVE_RELOAD_PATH, html)
+        self.assertTrue(html.endswith("</body></html>"))
+
+    def test_serves_other_files_untouched(self):
+        self.assertEqual(self.get("/index.css"), "body {}")
+
+    def test_reload_bumps_version(self):
+        self.assertEqual(self.get(LIVE_RELOAD_PATH), "0")
+        self.server.reload()
+        self.assertEqual(self.get(LIVE_RELOAD_PATH), "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
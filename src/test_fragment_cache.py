@@ -0,0 +1,123 @@
+import os
+import pickle
+import unittest
+
+from blocks import markdown_to_blocks, markdown_to_html_node
+import fragment_cache
+from fragment_cache import CachedFragments, FragmentCache
+from test_support import TempDirTestCase
+
+MARKDOWN = """# Title
+
+Some **bold** text with a [link](/blog/post) and ![img](/images/a.png).
+
+- item one
+- item _two_
+
+```
+code block
+```
+"""
+
+
+class TestFragmentCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, "cache", "fragments.sqlite3")
+
+    def test_cached_fragments_match_tree(self):
+        cache = FragmentCache()
+        for base_path in ("/", "/site/"):
+            fragments = CachedFragments(markdown_to_blocks(MARKDOWN), cache)
+            self.assertEqual(
+                fragments.to_html(base_path),
+                markdown_to_html_node(MARKDOWN).to_html(base_path),
+            )
+
+    def test_hits_and_misses(self):
+        cache = FragmentCache()
+        cache.render_block("Some **bold** text")
+        cache.render_block("Some **bold** text")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_includes_version_and_base_path(self):
+        cache = FragmentCache(version="a")
+        self.assertNotEqual(cache.key("block", "/"), cache.key("block", "/site/"))
+        self.assertNotEqual(
+            cache.key("block", "/"), FragmentCache(version="b").key("block", "/")
+        )
+
+    def test_memory_lru_eviction(self):
+        cache = FragmentCache(max_memory_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.get("a")
+        cache.put("c", "12345")
+        self.assertEqual(list(cache._memory), ["a", "c"])
+        self.assertIsNone(cache.get("b"))
+
+    def test_persists_across_instances(self):
+        cache = FragmentCache(self.path, "v1")
+        html = cache.render_block("Some **bold** text")
+        cache.close()
+
+        reopened = FragmentCache(self.path, "v1")
+        self.assertEqual(reopened.get(reopened.key("Some **bold** text", "/")), html)
+        self.assertEqual(reopened.hits, 1)
+        reopened.close()
+
+    def test_new_fragments_are_written_in_batches(self):
+        cache = FragmentCache(self.path, "v1")
+        cache.put("a", "12345")
+        reader = FragmentCache(self.path, "v1")
+        self.assertIsNone(reader.get("a"))
+        cache.put("b", "x" * fragment_cache.FLUSH_BYTES)
+        reader = FragmentCache(self.path, "v1")
+        self.assertEqual(reader.get("a"), "12345")
+        cache.close()
+
+    def test_unflushed_fragments_outlive_the_memory_lru(self):
+        cache = FragmentCache(self.path, "v1", max_memory_bytes=5)
+        cache.put("a", "12345")
+        cache.put("b", "67890")
+        self.assertNotIn("a", cache._memory)
+        self.assertEqual(cache.get("a"), "12345")
+        cache.close()
+
+    def test_flushed_fragments_are_found_on_disk(self):
+        cache = FragmentCache(self.path, "v1", max_memory_bytes=5)
+        cache.put("a", "12345")
+        cache.flush()
+        cache.put("b", "67890")
+        self.assertNotIn("a", cache._memory)
+        self.assertEqual(cache.get("a"), "12345")
+        cache.close()
+
+    def test_skips_disk_lookups_for_a_new_version(self):
+        cache = FragmentCache(self.path, "v1")
+        cache.render_block("Some **bold** text")
+        cache.close()
+
+        for version, has_version in (("v1", True), ("v2", False)):
+            reopened = FragmentCache(self.path, version)
+            reopened.get("missing")
+            self.assertIs(reopened._disk_has_version, has_version)
+            reopened.close()
+
+    def test_evict_disk_cap(self):
+        cache = FragmentCache(self.path, max_disk_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.flush()
+        cache.put("c", "12345")
+        cache.flush()
+        self.assertEqual(cache.evict(), 1)
+        cache.close()
+
+    def test_pickle_reuses_open_instance(self):
+        cache = FragmentCache(self.path, "v1")
+        self.assertIs(pickle.loads(pickle.dumps(cache)), cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
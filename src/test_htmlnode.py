@@ -1,6 +1,15 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+from htmlnode import (
+    HTMLNode,
+    LeafNode,
+    ParentNode,
+    escape_attribute,
+    escape_html,
+    tag_strings,
+    text_node_to_html_node,
+)
 from textnode import TextNode, TextType
 
 
@@ -37,6 +46,10 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(tag=p, value=Hello world!, children=[], props={'href': 'www.test.com'})",
         )
 
+    def test_slots(self):
+        for node in [HTMLNode(), LeafNode("b", "x"), ParentNode("p", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_raise_error_to_html(self):
         with self.assertRaises(NotImplementedError):
             HTMLNode().to_html()
@@ -61,10 +74,54 @@ class TestLeafNode(unittest.TestCase):
             '<a href="https://www.google.com">Click me!</a>',
         )
 
+    def test_leaf_to_html_rebases_urls(self):
+        node = LeafNode("a", "Home", {"href": "/blog/tom", "title": "/blog"})
+        self.assertEqual(
+            node.to_html("/site/"),
+            '<a href="/site/blog/tom" title="/blog">Home</a>',
+        )
+        node = LeafNode("a", "Out", {"href": "https://www.google.com"})
+        self.assertEqual(
+            node.to_html("/site/"),
+            '<a href="https://www.google.com">Out</a>',
+        )
+
     def test_leaf_to_html_with_no_tag(self):
         node = LeafNode(None, "test")
         self.assertEqual(node.to_html(), "test")
 
+    def test_leaf_to_html_escapes_value(self):
+        node = LeafNode("code", "if a < b && b > c:")
+        self.assertEqual(
+            node.to_html(), "<code>if a &lt; b &amp;&amp; b &gt; c:</code>"
+        )
+        self.assertEqual(LeafNode(None, "fish & chips").to_html(), "fish &amp; chips")
+
+    def test_leaf_to_html_escapes_props(self):
+        node = LeafNode("img", "", {"src": "/a.png?x=1&y=2", "alt": 'say "hi" <3'})
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/a.png?x=1&amp;y=2" alt="say &quot;hi&quot; &lt;3" />',
+        )
+
+    def test_escape_html_returns_clean_text_unchanged(self):
+        text = "nothing to escape here"
+        self.assertIs(escape_html(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_leaf_to_html_void_element(self):
+        node = LeafNode("img", "", {"src": "/a.png", "alt": "a"})
+        self.assertEqual(node.to_html(), '<img src="/a.png" alt="a" />')
+        self.assertEqual(LeafNode("br", "").to_html(), "<br />")
+
+    def test_tag_strings_are_cached(self):
+        self.assertIs(tag_strings("p"), tag_strings("p"))
+        self.assertEqual(tag_strings("p"), ("<p>", "<p", ">", "</p>"))
+        self.assertEqual(tag_strings("img"), ("<img />", "<img", " />", ""))
+        tag = "".join(["sec", "tion"])
+        self.assertIs(tag_strings(tag), tag_strings("section"))
+        self.assertEqual(LeafNode(tag, "x").to_html(), "<section>x</section>")
+
     def test_leaf_to_html_with_no_value(self):
         with self.assertRaisesRegex(ValueError, "All leaf nodes must have a value."):
             LeafNode(tag="p", value=None).to_html()
@@ -103,6 +160,34 @@ class TestParentNode(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, "All leaf nodes must have a value."):
             LeafNode("b", None).to_html()
 
+    def test_parent_node_write_html_streams_chunks(self):
+        grandchild_node = LeafNode("b", "grandchild")
+        child_node = ParentNode("span", [grandchild_node, LeafNode(None, " text")])
+        parent_node = ParentNode("div", [child_node], {"class": "page"})
+
+        chunks = []
+        parent_node.write_html(chunks.append)
+        self.assertEqual(
+            chunks,
+            [
+                '<div class="page">',
+                "<span>",
+                "<b>",
+                "grandchild",
+                "</b>",
+                " text",
+                "</span>",
+                "</div>",
+            ],
+        )
+
+    def test_parent_node_write_html_to_file(self):
+        parent_node = ParentNode("ul", [LeafNode("li", str(i)) for i in range(3)])
+        output = io.StringIO()
+        parent_node.write_html(output.write)
+        self.assertEqual(output.getvalue(), parent_node.to_html())
+        self.assertEqual(output.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+
 
 class TestConvertTextNodeToHMLTNode(unittest.TestCase):
     def test_text(self):
@@ -0,0 +1,131 @@
+import os
+import unittest
+
+from links import BrokenLink, LinkIndex, extract_block_links, link_target
+from split_nodes import text_to_textnodes
+from test_support import TempDirTestCase
+from textnode import TextType
+
+
+class TestExtractBlockLinks(unittest.TestCase):
+    def test_links_and_images_with_lines(self):
+        block = "See [a](/a) and\n![img](/images/b.png)\nthen [c](https://c.org)"
+        self.assertEqual(
+            extract_block_links(block, 10),
+            [(10, "/a"), (11, "/images/b.png"), (12, "https://c.org")],
+        )
+
+    def test_code_blocks_are_skipped(self):
+        self.assertEqual(extract_block_links("```\n[a](/a)\n```", 1), [])
+
+    def test_inline_code_is_skipped(self):
+        block = "Use `[x](/missing)` to link,\nlike **[y](/y)** or _[z](/z_1)_"
+        self.assertEqual(extract_block_links(block, 1), [(2, "/y"), (2, "/z_1")])
+
+    def test_matches_rendered_links(self):
+        for text in (
+            "a `[x](/x)` b [y](/y) ![i](/i.png)",
+            "_see [docs](/a_b) here_ and `code` [c](/c)",
+            "**[a](/a)** `not [b](/b)` [c](/c `x`)",
+            "[not a link] (/x) and ![d](/d)",
+        ):
+            rendered = [
+                node.url
+                for node in text_to_textnodes(text)
+                if node.text_type in (TextType.LINK, TextType.IMAGE)
+            ]
+            links = [url for _, url in extract_block_links(text, 1)]
+            self.assertEqual(links, rendered, text)
+
+
+class TestLinkTarget(unittest.TestCase):
+    def test_internal(self):
+        self.assertEqual(link_target("/blog/tom", "contact"), "blog/tom")
+        self.assertEqual(link_target("/blog/tom/#top", ""), "blog/tom")
+        self.assertEqual(link_target("/", "blog"), "")
+        self.assertEqual(link_target("../other", "blog/post"), "blog/other")
+        self.assertEqual(link_target("my%20file.png", "images"), "images/my file.png")
+
+    def test_external(self):
+        self.assertIsNone(link_target("https://boot.dev", ""))
+        self.assertIsNone(link_target("//cdn.example.com/a.js", ""))
+        self.assertIsNone(link_target("mailto:me@example.com", ""))
+        self.assertIsNone(link_target("#section", ""))
+
+
+class TestLinkIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest_dir = self.root
+        for path in ("index.html", "blog/tom/index.html", "images/tom.png"):
+            self.write(path, "")
+
+    def test_check(self):
+        link_index = LinkIndex()
+        link_index.add(
+            "content/blog/tom/index.md",
+            os.path.join(self.dest_dir, "blog/tom/index.html"),
+            [(3, "/"), (5, "/images/tom.png"), (7, "/images/bombadil.png")],
+        )
+        link_index.add(
+            "content/index.md",
+            os.path.join(self.dest_dir, "index.html"),
+            [(2, "blog/tom"), (4, "blog/legolas"), (6, "https://boot.dev")],
+        )
+        self.assertEqual(len(link_index), 6)
+        self.assertEqual(
+            link_index.check(self.dest_dir),
+            [
+                BrokenLink("content/blog/tom/index.md", 7, "/images/bombadil.png"),
+                BrokenLink("content/index.md", 4, "blog/legolas"),
+            ],
+        )
+        self.assertEqual(
+            str(link_index.check(self.dest_dir)[1]),
+            "content/index.md:4: broken link blog/legolas",
+        )
+
+    def test_check_updates_cached_targets(self):
+        link_index = LinkIndex()
+        tom_page = os.path.join(self.dest_dir, "blog/tom/index.html")
+        link_index.add(
+            "content/blog/tom/index.md",
+            tom_page,
+            [(3, "/"), (5, "/images/bombadil.png")],
+        )
+        link_index.add(
+            "content/index.md",
+            os.path.join(self.dest_dir, "index.html"),
+            [(2, "blog/tom")],
+        )
+        self.assertEqual(
+            link_index.check(self.dest_dir),
+            [BrokenLink("content/blog/tom/index.md", 5, "/images/bombadil.png")],
+        )
+
+        # Outputs are taken from the cached targets, not from disk.
+        bombadil = self.write("images/bombadil.png", "")
+        self.assertEqual(len(link_index.check(self.dest_dir)), 1)
+        link_index.add_output(bombadil, self.dest_dir)
+        self.assertEqual(link_index.check(self.dest_dir), [])
+
+        link_index.discard("content/blog/tom/index.md")
+        link_index.discard_output(tom_page, self.dest_dir)
+        self.assertEqual(
+            link_index.check(self.dest_dir),
+            [BrokenLink("content/index.md", 2, "blog/tom")],
+        )
+
+        search_dir = os.path.dirname(self.write("search/index.html", ""))
+        link_index.add(
+            "content/index.md",
+            os.path.join(self.dest_dir, "index.html"),
+            [(2, "search")],
+        )
+        self.assertEqual(len(link_index.check(self.dest_dir)), 1)
+        link_index.rescan(search_dir, self.dest_dir)
+        self.assertEqual(link_index.check(self.dest_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,432 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stderr
+
+from bodies import BodyStore
+from links import BrokenLink
+from main import (
+    BuildOptions,
+    build_inputs,
+    collect_pages,
+    generate_pages_recursive,
+    manifest_link_index,
+    parse_args,
+    rebuild_changed,
+)
+from manifest import Manifest
+from parse_cache import ParseCache
+from profiling import BuildProfiler
+from template import TemplateSet
+from test_support import SiteTestCase
+
+TEMPLATE = """<html>
+<head><title>{{ Title }}</title><link href="/index.css" /></head>
+<body>{{ Content }}</body>
+</html>
+"""
+
+PAGES = {
+    "index.md": "# Home\n\nSome **bold** text and a [link](/blog/post).",
+    "blog/post/index.md": "# Post\n\n- item one\n- item _two_\n\n![img](/images/a.png)",
+    "blog/other/index.md": "# Other\n\n```\ncode block\n```",
+    "contact/index.md": "# Contact\n\n> quoted\n> text",
+}
+
+
+class TestGeneratePages(SiteTestCase):
+    PAGES = PAGES
+    TEMPLATE = TEMPLATE
+
+    def test_collect_pages(self):
+        dest_dir = os.path.join(self.root, "docs")
+        pages = collect_pages(self.content_dir, dest_dir)
+        self.assertEqual(
+            pages,
+            [
+                (
+                    os.path.join(self.content_dir, "blog/other/index.md"),
+                    os.path.join(dest_dir, "blog/other/index.html"),
+                ),
+                (
+                    os.path.join(self.content_dir, "blog/post/index.md"),
+                    os.path.join(dest_dir, "blog/post/index.html"),
+                ),
+                (
+                    os.path.join(self.content_dir, "contact/index.md"),
+                    os.path.join(dest_dir, "contact/index.html"),
+                ),
+                (
+                    os.path.join(self.content_dir, "index.md"),
+                    os.path.join(dest_dir, "index.html"),
+                ),
+            ],
+        )
+
+    def test_parallel_output_matches_serial(self):
+        serial_dir = os.path.join(self.root, "serial")
+        parallel_dir = os.path.join(self.root, "parallel")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, serial_dir
+        )
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, parallel_dir, jobs=2
+        )
+
+        serial = self.read_tree(serial_dir)
+        self.assertEqual(len(serial), len(PAGES))
+        self.assertEqual(serial, self.read_tree(parallel_dir))
+
+    def test_parse_cache_output_matches_serial(self):
+        serial_dir = os.path.join(self.root, "serial")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, serial_dir
+        )
+        parse_cache = ParseCache(os.path.join(self.root, "parses"))
+        for jobs in (1, 2):
+            cached_dir = os.path.join(self.root, f"cached{jobs}")
+            generate_pages_recursive(
+                "/site/",
+                self.content_dir,
+                self.template_path,
+                cached_dir,
+                jobs=jobs,
+                options=BuildOptions(parse_cache=parse_cache),
+            )
+            self.assertEqual(self.read_tree(serial_dir), self.read_tree(cached_dir))
+        self.assertEqual(parse_cache.misses, len(PAGES))
+
+    def test_template_change_rewraps_stored_bodies(self):
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        body_store = BodyStore(os.path.join(self.root, "bodies"))
+        dest_dir = os.path.join(self.root, "docs")
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            dest_dir,
+            manifest,
+            options=BuildOptions(body_store=body_store),
+        )
+        self.write(self.template_path, TEMPLATE.replace("<body>", "<body><nav />"))
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            dest_dir,
+            manifest,
+            options=BuildOptions(body_store=body_store),
+        )
+        self.assertEqual(len(manifest.rewrappable), len(PAGES))
+
+        full_dir = os.path.join(self.root, "full")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, full_dir
+        )
+        self.assertEqual(self.read_tree(dest_dir), self.read_tree(full_dir))
+
+    def test_title_is_escaped(self):
+        self.write(os.path.join(self.content_dir, "index.md"), "# Fish & <Chips>")
+        dest_dir = os.path.join(self.root, "docs")
+        generate_pages_recursive("/", self.content_dir, self.template_path, dest_dir)
+        with open(os.path.join(dest_dir, "index.html")) as page_file:
+            self.assertIn("<title>Fish &amp; &lt;Chips&gt;</title>", page_file.read())
+
+    def test_rebuild_changed_template_rebuilds_dependents(self):
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        body_store = BodyStore(os.path.join(self.root, "bodies"))
+        dest_dir = os.path.join(self.root, "docs")
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            dest_dir,
+            manifest,
+            options=BuildOptions(body_store=body_store),
+        )
+        self.write(self.template_path, TEMPLATE.replace("<body>", "<body><nav />"))
+        rebuild_changed(
+            [self.template_path],
+            [],
+            self.content_dir,
+            TemplateSet(self.content_dir, self.template_path, "/site/"),
+            dest_dir,
+            manifest,
+            build_inputs("/site/"),
+            options=BuildOptions(body_store=body_store),
+        )
+        self.assertEqual(len(manifest.rewrappable), len(PAGES))
+
+        # Bodies replaced by a new render are removed.
+        post = self.write(
+            os.path.join(self.content_dir, "blog/post/index.md"), "# Post\n\nNew."
+        )
+        rebuild_changed(
+            [post],
+            [],
+            self.content_dir,
+            TemplateSet(self.content_dir, self.template_path, "/site/"),
+            dest_dir,
+            manifest,
+            build_inputs("/site/"),
+            options=BuildOptions(body_store=body_store),
+        )
+        self.assertEqual(len(os.listdir(body_store.folder)), len(PAGES))
+
+        full_dir = os.path.join(self.root, "full")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, full_dir
+        )
+        self.assertEqual(self.read_tree(dest_dir), self.read_tree(full_dir))
+
+    def test_rebuild_changed_retries_pages_left_by_a_failure(self):
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        dest_dir = os.path.join(self.root, "docs")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, dest_dir, manifest
+        )
+        post = os.path.join(self.content_dir, "blog/post/index.md")
+        self.write(self.template_path, TEMPLATE.replace("<body>", "<body><nav />"))
+        self.write(post, "No title")
+        args = (
+            self.content_dir,
+            TemplateSet(self.content_dir, self.template_path, "/site/"),
+            dest_dir,
+            manifest,
+            build_inputs("/site/"),
+        )
+        with self.assertRaisesRegex(Exception, "No header"):
+            rebuild_changed([self.template_path, post], [], *args)
+
+        # Fixing the page also brings the pages after it to the new template.
+        self.write(post, PAGES["blog/post/index.md"])
+        rebuild_changed([post], [], *args)
+        full_dir = os.path.join(self.root, "full")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, full_dir
+        )
+        self.assertEqual(self.read_tree(dest_dir), self.read_tree(full_dir))
+
+    def test_section_templates(self):
+        blog_template = self.write(
+            os.path.join(self.content_dir, "blog", "template.html"),
+            TEMPLATE.replace("<body>", "<body><nav>blog</nav>"),
+        )
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        dest_dir = os.path.join(self.root, "docs")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, dest_dir, manifest
+        )
+        parallel_dir = os.path.join(self.root, "parallel")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, parallel_dir, jobs=2
+        )
+
+        tree = self.read_tree(dest_dir)
+        self.assertEqual(tree, self.read_tree(parallel_dir))
+        self.assertEqual(len(tree), len(PAGES))
+        for path, html in tree.items():
+            self.assertEqual(b"<nav>blog</nav>" in html, path.startswith("blog"))
+        self.assertEqual(
+            manifest.dependents(blog_template),
+            {
+                os.path.join(self.content_dir, "blog/post/index.md"),
+                os.path.join(self.content_dir, "blog/other/index.md"),
+            },
+        )
+
+        os.remove(blog_template)
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, dest_dir, manifest
+        )
+        for html in self.read_tree(dest_dir).values():
+            self.assertNotIn(b"<nav>blog</nav>", html)
+        self.assertEqual(manifest.dependents(blog_template), set())
+
+    def test_profiled_output_matches_serial(self):
+        serial_dir = os.path.join(self.root, "serial")
+        profiled_dir = os.path.join(self.root, "profiled")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, serial_dir
+        )
+        profiler = BuildProfiler(track_allocations=False)
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            profiled_dir,
+            profiler=profiler,
+            options=BuildOptions(profile=True),
+        )
+
+        self.assertEqual(self.read_tree(serial_dir), self.read_tree(profiled_dir))
+        self.assertEqual(len(profiler.pages), len(PAGES))
+
+    def test_profiled_build_stores_bodies(self):
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        body_store = BodyStore(os.path.join(self.root, "bodies"))
+        dest_dir = os.path.join(self.root, "docs")
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            dest_dir,
+            manifest,
+            profiler=BuildProfiler(track_allocations=False),
+            options=BuildOptions(body_store=body_store, profile=True),
+        )
+        self.assertFalse(
+            any(path.endswith(".tmp") for path in self.read_tree(dest_dir))
+        )
+
+        self.write(self.template_path, TEMPLATE.replace("<body>", "<body><nav />"))
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            dest_dir,
+            manifest,
+            options=BuildOptions(body_store=body_store),
+        )
+        self.assertEqual(len(manifest.rewrappable), len(PAGES))
+
+        full_dir = os.path.join(self.root, "full")
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, full_dir
+        )
+        self.assertEqual(self.read_tree(dest_dir), self.read_tree(full_dir))
+
+    def test_link_index_uses_manifest_for_clean_pages(self):
+        self.write(
+            os.path.join(self.content_dir, "blog/post/index.md"),
+            "# Post\n\n[home](/)\n\n[gone](/blog/missing) and [up](../other)",
+        )
+        dest_dir = os.path.join(self.root, "docs")
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        expected = [
+            BrokenLink(
+                os.path.join(self.content_dir, "blog/post/index.md"),
+                5,
+                "/blog/missing",
+            )
+        ]
+        for _ in range(2):
+            link_index = generate_pages_recursive(
+                "/", self.content_dir, self.template_path, dest_dir, manifest
+            )
+            self.assertEqual(link_index.check(dest_dir), expected)
+
+    def test_rebuild_changed_updates_link_index(self):
+        dest_dir = os.path.join(self.root, "docs")
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        generate_pages_recursive(
+            "/", self.content_dir, self.template_path, dest_dir, manifest
+        )
+        link_index = manifest_link_index(manifest)
+        link_index.check(dest_dir)
+
+        post = os.path.join(self.content_dir, "blog/post/index.md")
+        templates = TemplateSet(self.content_dir, self.template_path, "/")
+        steps = [([], [post]), ([post], [])]
+        for changed, removed in steps:
+            if changed:
+                self.write(post, PAGES["blog/post/index.md"])
+            else:
+                os.remove(post)
+            rebuild_changed(
+                changed,
+                removed,
+                self.content_dir,
+                templates,
+                dest_dir,
+                manifest,
+                build_inputs("/"),
+                link_index=link_index,
+            )
+            broken = link_index.check(dest_dir)
+            self.assertEqual(broken, manifest_link_index(manifest).check(dest_dir))
+            self.assertEqual(
+                BrokenLink(os.path.join(self.content_dir, "index.md"), 3, "/blog/post")
+                in broken,
+                bool(removed),
+            )
+
+    def test_search_terms_match_across_render_paths(self):
+        search_entries = []
+        for name, jobs, parse_cache in (
+            ("serial", 1, None),
+            ("parallel", 2, None),
+            ("cached", 1, ParseCache(os.path.join(self.root, "parses"))),
+        ):
+            manifest = Manifest(os.path.join(self.root, f"{name}.json"))
+            generate_pages_recursive(
+                "/site/",
+                self.content_dir,
+                self.template_path,
+                os.path.join(self.root, name),
+                manifest,
+                jobs,
+                options=BuildOptions(parse_cache=parse_cache, search=True),
+            )
+            search_entries.append(manifest.search_terms.pages)
+
+        self.assertEqual(search_entries[0], search_entries[1])
+        self.assertEqual(search_entries[0], search_entries[2])
+        post = search_entries[0][os.path.join(self.content_dir, "blog/post/index.md")]
+        self.assertEqual(post, ["Post", ["img", "item", "one", "post", "two"]])
+
+    def test_parse_cache_adds_terms_when_search_is_turned_on(self):
+        parse_cache = ParseCache(os.path.join(self.root, "parses"))
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            os.path.join(self.root, "plain"),
+            options=BuildOptions(parse_cache=parse_cache),
+        )
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        generate_pages_recursive(
+            "/site/",
+            self.content_dir,
+            self.template_path,
+            os.path.join(self.root, "search"),
+            manifest,
+            options=BuildOptions(parse_cache=parse_cache, search=True),
+        )
+        self.assertEqual(parse_cache.hits, len(PAGES))
+        post = os.path.join(self.content_dir, "blog/post/index.md")
+        terms = ["img", "item", "one", "post", "two"]
+        self.assertEqual(manifest.search_terms.pages[post], ["Post", terms])
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_defaults(self):
+        args = parse_args([])
+        self.assertEqual(args.base_path, "/")
+        self.assertEqual(args.jobs, 1)
+        self.assertTrue(args.fragment_cache)
+        self.assertFalse(args.parse_cache)
+
+    def test_base_path_and_jobs(self):
+        args = parse_args(["/static-site-generator/", "--jobs", "4"])
+        self.assertEqual(args.base_path, "/static-site-generator/")
+        self.assertEqual(args.jobs, 4)
+
+    def test_jobs_zero_uses_all_cores(self):
+        self.assertEqual(parse_args(["-j", "0"]).jobs, os.cpu_count() or 1)
+
+    def test_negative_jobs(self):
+        stderr = io.StringIO()
+        with self.assertRaises(SystemExit), redirect_stderr(stderr):
+            parse_args(["-j", "-1"])
+        self.assertIn("--jobs must be >= 0", stderr.getvalue())
+
+    def test_shard(self):
+        self.assertEqual(parse_args(["--shard", "2/3"]).shard, (2, 3))
+        self.assertEqual(parse_args(["--merge-shards", "3"]).merge_shards, 3)
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            parse_args(["--shard", "1/2", "--merge-shards", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import os
+import unittest
+
+from manifest import Manifest, generator_version, hash_file
+from test_support import TempDirTestCase
+
+
+class TestManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.root, "cache", "manifest.json")
+        self.dest_dir = os.path.join(self.root, "docs")
+        self.inputs = {"generator": "1", "template": "abc", "base_path": "/"}
+
+    def build(self, manifest, pages):
+        for from_path, dest_path in pages:
+            self.write(dest_path, "built")
+            manifest.record(from_path)
+
+    def test_hash_file(self):
+        path = self.write("a.md", "# a")
+        self.assertEqual(hash_file(path), hash_file(path))
+        self.assertEqual(len(hash_file(path)), 64)
+
+    def test_generator_version_ignores_tooling(self):
+        for name in ("blocks.py", "bench.py", "devserver.py"):
+            self.write(os.path.join("src", name), "")
+        src_dir = os.path.join(self.root, "src")
+        version = generator_version(src_dir)
+
+        self.write("src/bench.py", "REPEAT = 5\n")
+        self.write("src/devserver.py", "PORT = 1\n")
+        self.assertEqual(generator_version(src_dir), version)
+        self.write("src/blocks.py", "TAB = 4\n")
+        self.assertNotEqual(generator_version(src_dir), version)
+
+    def test_load_missing_manifest(self):
+        manifest = Manifest.load(self.manifest_path)
+        self.assertEqual(manifest.pages, {})
+        self.assertEqual(manifest.inputs, {})
+
+    def test_unchanged_pages_are_clean(self):
+        pages = [
+            (
+                self.write("content/a.md", "# a"),
+                os.path.join(self.dest_dir, "a.html"),
+            )
+        ]
+
+        manifest = Manifest.load(self.manifest_path)
+        dirty = manifest.dirty_pages(pages, self.inputs)
+        self.assertEqual(dirty, pages)
+        self.build(manifest, dirty)
+        manifest.save()
+
+        manifest = Manifest.load(self.manifest_path)
+        self.assertEqual(manifest.dirty_pages(pages, self.inputs), [])
+
+    def test_changed_page_is_dirty(self):
+        page_a = (
+            self.write("content/a.md", "# a"),
+            os.path.join(self.dest_dir, "a.html"),
+        )
+        page_b = (
+            self.write("content/b.md", "# b"),
+            os.path.join(self.dest_dir, "b.html"),
+        )
+
+        manifest = Manifest.load(self.manifest_path)
+        self.build(manifest, manifest.dirty_pages([page_a, page_b], self.inputs))
+        manifest.save()
+
+        self.write("content/b.md", "# b changed")
+        manifest = Manifest.load(self.manifest_path)
+        self.assertEqual(
+            manifest.dirty_pages([page_a, page_b], self.inputs),
+            [page_b],
+        )
+
+    def test_changed_inputs_rebuild_everything(self):
+        pages = [
+            (
+                self.write("content/a.md", "# a"),
+                os.path.join(self.dest_dir, "a.html"),
+            )
+        ]
+
+        manifest = Manifest.load(self.manifest_path)
+        self.build(manifest, manifest.dirty_pages(pages, self.inputs))
+        manifest.save()
+
+        manifest = Manifest.load(self.manifest_path)
+        inputs = dict(self.inputs, template="def")
+        self.assertEqual(manifest.dirty_pages(pages, inputs), pages)
+
+    def test_template_only_change_is_rewrappable(self):
+        page_a = (
+            self.write("content/a.md", "# a"),
+            os.path.join(self.dest_dir, "a.html"),
+        )
+        page_b = (
+            self.write("content/b.md", "# b"),
+            os.path.join(self.dest_dir, "b.html"),
+        )
+        template = self.write("template.html", "{{ Content }}")
+        dependencies = {page_a[0]: [template], page_b[0]: [template]}
+
+        manifest = Manifest.load(self.manifest_path)
+        dirty = manifest.dirty_pages([page_a, page_b], self.inputs, dependencies)
+        for from_path, dest_path in dirty:
+            self.write(dest_path, "built")
+            manifest.record(from_path, [[1, "/"]], f"body-{from_path[-4]}")
+        self.write("content/b.md", "# b changed")
+        self.write("template.html", "<main>{{ Content }}</main>")
+
+        self.assertEqual(
+            manifest.dirty_pages([page_a, page_b], self.inputs, dependencies),
+            [page_a, page_b],
+        )
+        self.assertEqual(manifest.rewrappable, {page_a[0]})
+        manifest.record(page_a[0])
+        self.assertEqual(manifest.pages[page_a[0]]["body"], "body-a")
+        self.assertEqual(manifest.pages[page_a[0]]["links"], [[1, "/"]])
+        manifest.record(page_b[0], [])
+        self.assertNotIn("body", manifest.pages[page_b[0]])
+
+        inputs = dict(self.inputs, base_path="/site/")
+        manifest.dirty_pages([page_a, page_b], inputs, dependencies)
+        self.assertEqual(manifest.rewrappable, set())
+
+    def test_changed_dependency_dirties_its_dependents(self):
+        pages = [
+            (
+                self.write(f"content/{name}.md", f"# {name}"),
+                os.path.join(self.dest_dir, f"{name}.html"),
+            )
+            for name in "abc"
+        ]
+        shared = self.write("shared.html", "shared")
+        section = self.write("section.html", "section")
+        dependencies = {
+            pages[0][0]: [shared],
+            pages[1][0]: [shared, section],
+            pages[2][0]: [],
+        }
+
+        manifest = Manifest.load(self.manifest_path)
+        self.build(manifest, manifest.dirty_pages(pages, self.inputs, dependencies))
+        manifest.save()
+
+        manifest = Manifest.load(self.manifest_path)
+        self.assertEqual(manifest.dependents(shared), {pages[0][0], pages[1][0]})
+        self.assertEqual(manifest.dependents(section), {pages[1][0]})
+        self.write("section.html", "new section")
+        self.assertEqual(
+            manifest.dirty_pages(pages, self.inputs, dependencies), [pages[1]]
+        )
+        manifest.record(pages[1][0])
+
+        dependencies[pages[1][0]] = [shared]
+        self.assertEqual(
+            manifest.dirty_pages(pages, self.inputs, dependencies), [pages[1]]
+        )
+        manifest.record(pages[1][0])
+        self.assertEqual(manifest.dependents(section), set())
+        manifest.save()
+        self.assertNotIn(section, Manifest.load(self.manifest_path).files)
+
+    def test_failed_rebuild_keeps_dependency_change(self):
+        pages = [
+            (
+                self.write(f"content/{name}.md", f"# {name}"),
+                os.path.join(self.dest_dir, f"{name}.html"),
+            )
+            for name in "ab"
+        ]
+        template = self.write("template.html", "{{ Content }}")
+        dependencies = {from_path: [template] for from_path, _ in pages}
+        manifest = Manifest.load(self.manifest_path)
+        self.build(manifest, manifest.dirty_pages(pages, self.inputs, dependencies))
+        manifest.save()
+
+        # The build fails after rendering the first page again.
+        self.write("template.html", "<main>{{ Content }}</main>")
+        manifest.dirty_pages(pages, self.inputs, dependencies)
+        self.build(manifest, pages[:1])
+        self.assertEqual(manifest.stale_dependents(), {pages[1][0]})
+        manifest.save()
+
+        manifest = Manifest.load(self.manifest_path)
+        self.assertEqual(manifest.dirty_pages(pages, self.inputs, dependencies), pages)
+        self.build(manifest, pages)
+        self.assertEqual(manifest.stale_dependents(), set())
+        self.assertEqual(manifest.dirty_pages(pages, self.inputs, dependencies), [])
+
+    def test_clean_pages_keep_search_terms(self):
+        page = (
+            self.write("content/a.md", "# a"),
+            os.path.join(self.dest_dir, "a.html"),
+        )
+        manifest = Manifest.load(self.manifest_path)
+        manifest.dirty_pages([page], self.inputs)
+        self.write(page[1], "built")
+        manifest.record(page[0], [], None, ("a", ["a"]))
+
+        self.assertEqual(manifest.dirty_pages([page], self.inputs), [])
+        manifest.save()
+
+        # Terms are saved next to the manifest, not in it.
+        self.assertNotIn("search", manifest.pages[page[0]])
+        manifest = Manifest.load(self.manifest_path)
+        self.assertEqual(manifest.search_terms.pages, {page[0]: ["a", ["a"]]})
+        manifest.dirty_pages([page], dict(self.inputs, generator="2"))
+        manifest.record(page[0], [])
+        self.assertEqual(manifest.search_terms.pages, {})
+
+    def test_remove_stale_outputs(self):
+        page_a = (
+            self.write("content/a.md", "# a"),
+            os.path.join(self.dest_dir, "a.html"),
+        )
+        page_b = (
+            self.write("content/blog/b.md", "# b"),
+            os.path.join(self.dest_dir, "blog", "b.html"),
+        )
+
+        manifest = Manifest.load(self.manifest_path)
+        self.build(manifest, manifest.dirty_pages([page_a, page_b], self.inputs))
+
+        removed = manifest.remove_stale_outputs([page_a], self.dest_dir)
+        self.assertEqual(removed, [page_b[1]])
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "blog")))
+        self.assertTrue(os.path.isfile(page_a[1]))
+        self.assertNotIn(page_b[0], manifest.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
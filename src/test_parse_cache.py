@@ -0,0 +1,93 @@
+import os
+import time
+import unittest
+
+from blocks import (
+    ParsedDocument,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    parse_block,
+)
+from parse_cache import ParseCache, ParsedPage, dump_page, load_page
+from test_support import TempDirTestCase
+
+MARKDOWN = """# Title
+
+Some **bold** text with a [link](/blog/post) and ![img](/images/a.png).
+
+1. item one
+2. item _two_
+
+```
+code block
+```
+"""
+
+
+def parsed_page(markdown):
+    blocks = markdown_to_blocks(markdown)
+    return ParsedPage(
+        "Title",
+        [[3, "/blog/post"], [3, "/images/a.png"]],
+        blocks,
+        [parse_block(block) for block in blocks],
+        ["block", "code", "title"],
+    )
+
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = os.path.join(self.root, "parses")
+
+    def test_dump_and_load(self):
+        page = parsed_page(MARKDOWN)
+        loaded = load_page(dump_page(page))
+        self.assertEqual(loaded.title, page.title)
+        self.assertEqual(loaded.links, page.links)
+        self.assertEqual(loaded.blocks, page.blocks)
+        self.assertEqual(list(loaded.parsed_blocks), page.parsed_blocks)
+        self.assertEqual(loaded.terms, page.terms)
+
+    def test_dump_and_load_without_terms(self):
+        page = parsed_page(MARKDOWN)._replace(terms=None)
+        self.assertIsNone(load_page(dump_page(page)).terms)
+
+    def test_loaded_page_renders_like_markdown(self):
+        loaded = load_page(dump_page(parsed_page(MARKDOWN)))
+        self.assertEqual(
+            ParsedDocument(loaded.parsed_blocks).to_html("/site/"),
+            markdown_to_html_node(MARKDOWN).to_html("/site/"),
+        )
+
+    def test_get_and_put(self):
+        cache = ParseCache(self.folder, "v1")
+        self.assertIsNone(cache.get(MARKDOWN))
+        cache.put(MARKDOWN, parsed_page(MARKDOWN))
+        self.assertEqual(cache.get(MARKDOWN).blocks, markdown_to_blocks(MARKDOWN))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_version_is_part_of_the_key(self):
+        ParseCache(self.folder, "v1").put(MARKDOWN, parsed_page(MARKDOWN))
+        self.assertIsNone(ParseCache(self.folder, "v2").get(MARKDOWN))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.folder)
+        os.makedirs(self.folder)
+        with open(cache.path(cache.key(MARKDOWN)), "wb") as cache_file:
+            cache_file.write(b"not marshal")
+        self.assertIsNone(cache.get(MARKDOWN))
+
+    def test_prune_removes_oldest(self):
+        cache = ParseCache(self.folder)
+        cache.put("# old", parsed_page("# old"))
+        old_path = cache.path(cache.key("# old"))
+        os.utime(old_path, (time.time() - 60, time.time() - 60))
+        cache.put("# new", parsed_page("# new"))
+        size = os.path.getsize(cache.path(cache.key("# new")))
+        self.assertEqual(cache.prune(size), 1)
+        self.assertFalse(os.path.exists(old_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import unittest
+
+import pipeline
+from pipeline import PagePipeline, make_dest_dirs, write_output
+from test_support import TempDirTestCase
+
+
+class TestPipeline(TempDirTestCase):
+    def test_make_dest_dirs(self):
+        pages = [
+            ("a.md", os.path.join(self.root, "docs/blog/a/index.html")),
+            ("b.md", os.path.join(self.root, "docs/blog/b/index.html")),
+            ("c.md", "index.html"),
+        ]
+        make_dest_dirs(pages)
+        self.assertTrue(os.path.isdir(os.path.join(self.root, "docs/blog/a")))
+        self.assertTrue(os.path.isdir(os.path.join(self.root, "docs/blog/b")))
+
+    def test_reads_ahead_in_order(self):
+        pages = [
+            (self.write(f"{i}.md", f"# {i}"), os.path.join(self.root, f"{i}.html"))
+            for i in range(20)
+        ]
+        with PagePipeline(pages, threads=2) as page_pipeline:
+            read = list(page_pipeline)
+        self.assertEqual(
+            read,
+            [
+                (from_path, dest_path, f"# {i}")
+                for i, (from_path, dest_path) in enumerate(pages)
+            ],
+        )
+
+    def test_large_sources_are_not_read_ahead(self):
+        from_path = self.write("big.md", "# big")
+        limit = pipeline.READ_AHEAD_LIMIT
+        pipeline.READ_AHEAD_LIMIT = 2
+        try:
+            with PagePipeline([(from_path, "big.html")]) as page_pipeline:
+                self.assertEqual(list(page_pipeline), [(from_path, "big.html", None)])
+        finally:
+            pipeline.READ_AHEAD_LIMIT = limit
+
+    def test_writes_finish_on_close(self):
+        dest_path = os.path.join(self.root, "out.html")
+        with PagePipeline([]) as page_pipeline:
+            page_pipeline.write(dest_path, ["<p>", "hi", "</p>"])
+        with open(dest_path) as file:
+            self.assertEqual(file.read(), "<p>hi</p>")
+
+    def test_writes_in_flight_are_bounded(self):
+        with PagePipeline([], threads=2) as page_pipeline:
+            for i in range(50):
+                dest_path = os.path.join(self.root, f"{i}.html")
+                page_pipeline.write(dest_path, ["<p>", str(i), "</p>"])
+                self.assertLessEqual(len(page_pipeline._writes), 4)
+        self.assertEqual(len(os.listdir(self.root)), 50)
+
+    def test_write_errors_are_raised(self):
+        dest_path = os.path.join(self.root, "missing", "out.html")
+        with self.assertRaises(FileNotFoundError):
+            with PagePipeline([]) as page_pipeline:
+                page_pipeline.write(dest_path, ["x"])
+
+    def test_write_output_leaves_no_tmp_file(self):
+        dest_path = os.path.join(self.root, "out.html")
+        write_output(dest_path, ["a", "b"])
+        self.assertEqual(os.listdir(self.root), ["out.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from preview import Site
+from test_support import SiteTestCase
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>\n"
+
+PAGES = {
+    "index.md": "# Home\n\nA [link](/blog/post).",
+    "blog/post/index.md": "# Post\n\n- one\n- two",
+    "notes.md": "# Notes\n\nSome _notes_.",
+}
+
+
+class TestSite(SiteTestCase):
+    PAGES = PAGES
+    TEMPLATE = TEMPLATE
+
+    def touch_later(self, path):
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_render_by_url(self):
+        site = Site(self.content_dir, self.template_path, "/site/")
+        home = site.render("/")
+        self.assertEqual(
+            home,
+            "<title>Home</title><body><div><h1>Home</h1>"
+            '<p>A <a href="/site/blog/post">link</a>.</p></div></body>\n',
+        )
+        post = site.render("/blog/post/")
+        self.assertEqual(site.render("blog/post/index.html"), post)
+        self.assertEqual(site.render("/blog/post"), post)
+        self.assertIn("<i>notes</i>", site.render("/notes.html"))
+        self.assertEqual(site.render("/notes"), site.render("/notes.html"))
+        self.assertEqual(len(site), 3)
+
+    def test_missing_page(self):
+        self.write(os.path.join(self.root, "secret.md"), "# Secret")
+        site = Site(self.content_dir, self.template_path)
+        for path in ("/nothing/", "/../secret.md", "/../secret.html"):
+            with self.assertRaises(FileNotFoundError):
+                site.render(path)
+
+    def test_renders_lazily_and_memoizes(self):
+        site = Site(self.content_dir, self.template_path)
+        self.assertEqual(len(site), 0)
+        html = site.render("/")
+        self.assertIs(site.render("/"), html)
+        self.assertEqual((site.hits, site.misses), (1, 1))
+
+    def test_source_change_invalidates(self):
+        site = Site(self.content_dir, self.template_path)
+        path = os.path.join(self.content_dir, "index.md")
+        site.render("/")
+
+        # A new mtime alone is checked against the hash and still hits.
+        self.touch_later(path)
+        site.render("/")
+        self.assertEqual((site.hits, site.misses), (1, 1))
+
+        self.write(path, "# Changed\n\nNew text.")
+        self.touch_later(path)
+        self.assertIn("<h1>Changed</h1>", site.render("/"))
+        self.assertEqual((site.hits, site.misses), (1, 2))
+
+    def test_template_change_invalidates(self):
+        site = Site(self.content_dir, self.template_path)
+        site.render("/blog/post/")
+
+        self.write(self.template_path, "<main>{{ Content }}</main>")
+        self.touch_later(self.template_path)
+        self.assertTrue(site.render("/blog/post/").startswith("<main>"))
+
+        # A section template added later takes over the pages below it.
+        self.write(
+            os.path.join(self.content_dir, "blog", "template.html"),
+            "<article>{{ Content }}</article>",
+        )
+        self.assertTrue(site.render("/blog/post/").startswith("<article>"))
+        self.assertTrue(site.render("/").startswith("<main>"))
+        self.assertEqual(site.hits, 0)
+
+    def test_lru_eviction(self):
+        probe = Site(self.content_dir, self.template_path)
+        home, notes, post = (
+            sys.getsizeof(probe.render(path)) for path in ("/", "/notes", "/blog/post")
+        )
+        # Room for any two of the three pages.
+        max_bytes = notes + max(home, post)
+        site = Site(self.content_dir, self.template_path, max_bytes=max_bytes)
+        site.render("/notes")
+        site.render("/")
+        site.render("/notes")
+        site.render("/blog/post/")
+        self.assertLessEqual(site.size, site.max_bytes)
+
+        # The home page was the least recently used page and was evicted.
+        site.render("/notes")
+        self.assertEqual((site.hits, site.misses), (2, 3))
+        site.render("/")
+        self.assertEqual((site.hits, site.misses), (2, 4))
+
+    def test_clear(self):
+        site = Site(self.content_dir, self.template_path)
+        site.render("/")
+        site.clear()
+        self.assertEqual((len(site), site.size), (0, 0))
+        site.render("/")
+        self.assertEqual(site.misses, 2)
+
+    def test_import_has_no_side_effects(self):
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        result = subprocess.run(
+            [sys.executable, "-c", "import preview"],
+            cwd=self.root,
+            env=dict(os.environ, PYTHONPATH=src_dir),
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual((result.returncode, result.stdout), (0, ""))
+        self.assertEqual(sorted(os.listdir(self.root)), ["content", "template.html"])
+
+    def test_import_leaves_out_the_build_tooling(self):
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        modules = ["main", "argparse", "http.server", "sqlite3", "multiprocessing"]
+        script = (
+            f"import preview, sys; print([m for m in {modules} if m in sys.modules])"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            env=dict(os.environ, PYTHONPATH=src_dir),
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.stdout, "[]\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from profiling import STAGES, BuildProfiler, PageProfile
+
+
+class TestPageProfile(unittest.TestCase):
+    def test_stage_accumulates_time(self):
+        page_profile = PageProfile("a.md")
+        with page_profile.stage("read"):
+            pass
+        with page_profile.stage("read"):
+            pass
+        self.assertGreater(page_profile.seconds["read"], 0)
+        self.assertEqual(page_profile.seconds["write"], 0)
+        self.assertEqual(page_profile.total_seconds, page_profile.seconds["read"])
+
+    def test_stage_tracks_allocations(self):
+        profiler = BuildProfiler()
+        profiler.start()
+        try:
+            page_profile = PageProfile("a.md")
+            with page_profile.stage("build"):
+                data = [str(i) for i in range(10000)]
+        finally:
+            profiler.stop()
+        self.assertEqual(len(data), 10000)
+        self.assertGreater(page_profile.peak_bytes["build"], 10000)
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_report(self):
+        profiler = BuildProfiler(track_allocations=False)
+        for i, path in enumerate(["fast.md", "slow.md", "medium.md"]):
+            page_profile = PageProfile(path)
+            page_profile.seconds["inline"] = [0.1, 3.0, 1.0][i]
+            page_profile.seconds["write"] = 0.5
+            profiler.add(page_profile)
+
+        totals = profiler.stage_totals()
+        self.assertEqual(list(totals), list(STAGES))
+        self.assertAlmostEqual(totals["inline"][0], 4.1)
+        self.assertAlmostEqual(totals["write"][0], 1.5)
+
+        report = profiler.report(top=2)
+        self.assertIn("Profiled 3 pages", report)
+        self.assertIn("Slowest 2 pages:", report)
+        self.assertIn("slow.md (mostly inline)", report)
+        self.assertNotIn("fast.md", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
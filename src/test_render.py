@@ -0,0 +1,23 @@
+import io
+import unittest
+
+from render import stream_markdown
+
+
+class TestStreamMarkdown(unittest.TestCase):
+    def test_title_and_blocks(self):
+        markdown = "# A long title\n\nfirst block\n\n- one\n- two\n"
+        title, blocks = stream_markdown(io.StringIO(markdown), chunk_size=4)
+        self.assertEqual(title, "A long title")
+        self.assertEqual(
+            list(blocks),
+            [(1, "# A long title"), (3, "first block"), (5, "- one\n- two")],
+        )
+
+    def test_missing_title(self):
+        with self.assertRaises(Exception):
+            stream_markdown(io.StringIO("no title\n\nbody"), chunk_size=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
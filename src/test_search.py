@@ -0,0 +1,184 @@
+import gzip
+import json
+import os
+import unittest
+
+from blocks import markdown_to_blocks, parse_block
+from search import (
+    SearchIndex,
+    SearchTerms,
+    collect_terms,
+    page_terms,
+    page_url,
+    remove_search_index,
+    search_terms_path,
+    term_shard,
+)
+from test_support import TempDirTestCase
+
+MARKDOWN = """# The Title
+
+Some **bold** text with a [link](/blog/post) and ![an image](/a.png).
+
+- First item
+- Second item
+
+```
+code Block
+```
+"""
+
+
+class TestTerms(unittest.TestCase):
+    def test_page_terms(self):
+        parsed_blocks = [parse_block(block) for block in markdown_to_blocks(MARKDOWN)]
+        self.assertEqual(
+            page_terms(parsed_blocks),
+            [
+                "a",
+                "an",
+                "and",
+                "block",
+                "bold",
+                "code",
+                "first",
+                "image",
+                "item",
+                "link",
+                "second",
+                "some",
+                "text",
+                "the",
+                "title",
+                "with",
+            ],
+        )
+
+    def test_collect_terms_passes_blocks_through(self):
+        parsed_blocks = [parse_block("Hello *World*")]
+        terms = set()
+        self.assertEqual(list(collect_terms(parsed_blocks, terms)), parsed_blocks)
+        self.assertEqual(terms, {"hello", "world"})
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs", "/site/"), "/site/")
+        self.assertEqual(
+            page_url("docs/blog/post/index.html", "docs", "/site/"),
+            "/site/blog/post/",
+        )
+        self.assertEqual(page_url("docs/about.html", "docs", "/"), "/about.html")
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest_dir = self.root
+
+    def read(self, name):
+        with gzip.open(os.path.join(self.dest_dir, "search", name)) as index_file:
+            return json.load(index_file)
+
+    def test_postings_are_delta_encoded(self):
+        search_index = SearchIndex()
+        search_index.add("/a/", "A", ["common", "only"])
+        search_index.add("/b/", "B", ["common"])
+        search_index.add("/c/", "C", ["common", "other"])
+        self.assertEqual(
+            search_index.shards(),
+            [{"common": [0, 1, 1], "only": [0], "other": [2]}],
+        )
+
+    def test_write(self):
+        search_index = SearchIndex()
+        search_index.add("/a/", "A", ["alpha", "beta"])
+        search_index.add("/b/", "B", ["beta"])
+        digests = {}
+        written, size = search_index.write(self.dest_dir, digests)
+        self.assertEqual(
+            (written, sorted(digests)), (2, ["index.json.gz", "terms-0.json.gz"])
+        )
+
+        index = self.read("index.json.gz")
+        self.assertEqual(index["pages"], [["/a/", "A"], ["/b/", "B"]])
+        self.assertEqual(index["shards"], 1)
+        self.assertEqual(self.read("terms-0.json.gz"), {"alpha": [0], "beta": [0, 1]})
+        self.assertEqual(search_index.write(self.dest_dir)[1], size)
+
+        # Only files whose content changed are written again.
+        self.assertEqual(search_index.write(self.dest_dir, digests), (0, 0))
+        search_index.pages[1][1] = "Renamed"
+        self.assertEqual(search_index.write(self.dest_dir, digests)[0], 1)
+        os.remove(os.path.join(self.dest_dir, "search", "terms-0.json.gz"))
+        self.assertEqual(search_index.write(self.dest_dir, digests)[0], 1)
+
+    def test_shards_follow_term_count(self):
+        search_index = SearchIndex()
+        terms = [f"term{i}" for i in range(5000)]
+        search_index.add("/a/", "A", terms)
+        search_index.write(self.dest_dir)
+        self.assertEqual(self.read("index.json.gz")["shards"], 2)
+        for term in ("term0", "term4999"):
+            shard = self.read(f"terms-{term_shard(term, 2)}.json.gz")
+            self.assertEqual(shard[term], [0])
+
+        search_index = SearchIndex()
+        search_index.add("/a/", "A", ["one"])
+        search_index.write(self.dest_dir)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.dest_dir, "search"))),
+            ["index.json.gz", "terms-0.json.gz"],
+        )
+
+    def test_remove_search_index(self):
+        search_index = SearchIndex()
+        search_index.add("/a/", "A", ["alpha"])
+        search_index.write(self.dest_dir)
+        self.assertEqual(remove_search_index(self.dest_dir), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "search")))
+        self.assertEqual(remove_search_index(self.dest_dir), 0)
+
+        # Other files in the folder, e.g. static assets, are left alone.
+        search_index.write(self.dest_dir)
+        asset = os.path.join(self.dest_dir, "search", "search.js")
+        with open(asset, "w") as asset_file:
+            asset_file.write("")
+        self.assertEqual(remove_search_index(self.dest_dir), 2)
+        folder = os.path.join(self.dest_dir, "search")
+        self.assertEqual(os.listdir(folder), ["search.js"])
+
+
+class TestSearchTerms(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = search_terms_path(os.path.join(self.root, "manifest.json"))
+
+    def test_save_and_load(self):
+        search_terms = SearchTerms(self.path)
+        search_terms.set("a.md", ("A", ["alpha"]))
+        search_terms.digests["index.json.gz"] = "abc"
+        search_terms.save()
+
+        search_terms = SearchTerms(self.path)
+        self.assertEqual(search_terms.pages, {"a.md": ["A", ["alpha"]]})
+        self.assertEqual(search_terms.digests, {"index.json.gz": "abc"})
+        search_terms.discard("b.md")
+        self.assertFalse(search_terms.changed)
+
+    def test_unchanged_terms_are_not_read(self):
+        search_terms = SearchTerms(self.path)
+        search_terms.discard("a.md")
+        search_terms.save()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(search_terms._pages)
+
+    def test_clear_removes_the_file(self):
+        search_terms = SearchTerms(self.path)
+        search_terms.set("a.md", ("A", ["alpha"]))
+        search_terms.save()
+        search_terms.clear()
+        search_terms.save()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import argparse
+import os
+import unittest
+
+from main import collect_pages, generate_pages_recursive
+from manifest import Manifest
+from shards import (
+    merge_shards,
+    parse_shard,
+    shard_dest_dir,
+    shard_manifest_path,
+    shard_of,
+    shard_pages,
+)
+from test_support import SiteTestCase
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>\n"
+
+PAGES = {
+    "index.md": "# Home\n\n[post](/blog/post)",
+    "blog/post/index.md": "# Post\n\n- one\n- two",
+    "blog/other/index.md": "# Other\n\n> quoted",
+    "contact/index.md": "# Contact\n\nSome *text*.",
+    "about/index.md": "# About\n\n```\ncode\n```",
+}
+
+
+class TestParseShard(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual(parse_shard("1/4"), (1, 4))
+        self.assertEqual(parse_shard("4/4"), (4, 4))
+
+    def test_invalid(self):
+        for value in ("0/4", "5/4", "1/0", "1", "a/b", "1/2/3"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(value)
+
+
+class TestShardOf(unittest.TestCase):
+    def test_stable_and_in_range(self):
+        for path in PAGES:
+            shard = shard_of(path, 3)
+            self.assertIn(shard, (1, 2, 3))
+            self.assertEqual(shard, shard_of(path, 3))
+        self.assertEqual(shard_of("index.md", 1), 1)
+
+
+class TestShardedBuild(SiteTestCase):
+    PAGES = PAGES
+    TEMPLATE = TEMPLATE
+
+    def setUp(self):
+        super().setUp()
+        self.shard_dir = os.path.join(self.root, "shards")
+        self.dest_dir = os.path.join(self.root, "docs")
+
+    def build_shard(self, shard, base_path="/site/"):
+        manifest = Manifest(shard_manifest_path(self.shard_dir, shard))
+        generate_pages_recursive(
+            base_path,
+            self.content_dir,
+            self.template_path,
+            shard_dest_dir(self.shard_dir, shard),
+            manifest,
+            shard=shard,
+        )
+        manifest.save()
+
+    def merge(self, count):
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        merge_shards(self.shard_dir, count, self.dest_dir, manifest)
+        return manifest
+
+    def test_shard_pages_partition(self):
+        pages = collect_pages(self.content_dir, self.dest_dir)
+        shards = [shard_pages(pages, self.content_dir, (i, 3)) for i in (1, 2, 3)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(pages))
+
+    def test_merge_matches_unsharded_build(self):
+        full_dir = os.path.join(self.root, "full")
+        full_manifest = Manifest(os.path.join(self.root, "full.json"))
+        generate_pages_recursive(
+            "/site/", self.content_dir, self.template_path, full_dir, full_manifest
+        )
+        for index in (1, 2, 3):
+            self.build_shard((index, 3))
+        manifest = self.merge(3)
+
+        self.assertEqual(self.read_tree(full_dir), self.read_tree(self.dest_dir))
+        self.assertEqual(manifest.inputs, full_manifest.inputs)
+        self.assertEqual(set(manifest.pages), set(full_manifest.pages))
+        for from_path, entry in manifest.pages.items():
+            self.assertTrue(entry["output"].startswith(self.dest_dir))
+            self.assertEqual(entry["links"], full_manifest.pages[from_path]["links"])
+
+    def test_merge_removes_pages_missing_from_all_shards(self):
+        for index in (1, 2):
+            self.build_shard((index, 2))
+        manifest = self.merge(2)
+        os.remove(os.path.join(self.content_dir, "contact/index.md"))
+        for index in (1, 2):
+            self.build_shard((index, 2))
+        merge_shards(self.shard_dir, 2, self.dest_dir, manifest)
+
+        self.assertNotIn("contact", os.listdir(self.dest_dir))
+        self.assertEqual(len(manifest.pages), len(PAGES) - 1)
+
+    def test_missing_shard(self):
+        self.build_shard((1, 2))
+        with self.assertRaises(ValueError):
+            self.merge(2)
+
+    def test_shards_with_different_inputs_conflict(self):
+        self.build_shard((1, 2), "/site/")
+        self.build_shard((2, 2), "/other/")
+        with self.assertRaisesRegex(ValueError, "other inputs"):
+            self.merge(2)
+
+    def test_search_index_is_checked_before_merging(self):
+        for index in (1, 2):
+            self.build_shard((index, 2))
+        manifest = Manifest(os.path.join(self.root, "manifest.json"))
+        with self.assertRaisesRegex(ValueError, "without --search-index"):
+            merge_shards(self.shard_dir, 2, self.dest_dir, manifest, search=True)
+        self.assertFalse(os.path.exists(self.dest_dir))
+        self.assertEqual(manifest.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -225,6 +225,28 @@ class TestSplitDelimiterNode(unittest.TestCase):
         new_nodes = split_nodes_link(new_nodes)
         self.assertListEqual(new_nodes, expected_nodes)
 
+    def test_split_nodes_link_after_image_with_same_text(self):
+        node = TextNode(
+            "![boot dev](https://www.boot.dev) and [boot dev](https://www.boot.dev)",
+            TextType.TEXT,
+        )
+        expected_nodes = [
+            TextNode("![boot dev](https://www.boot.dev) and ", TextType.TEXT),
+            TextNode("boot dev", TextType.LINK, "https://www.boot.dev"),
+        ]
+        self.assertEqual(split_nodes_link([node]), expected_nodes)
+
+    def test_split_nodes_link_many_links(self):
+        text = " ".join(f"[page {i}](/pages/{i})" for i in range(500))
+        nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(nodes), 999)
+        self.assertEqual(nodes[0], TextNode("page 0", TextType.LINK, "/pages/0"))
+        self.assertEqual(nodes[-1], TextNode("page 499", TextType.LINK, "/pages/499"))
+
+    def test_split_nodes_link_skip_not_text_node(self):
+        node = TextNode("[link](https://boot.dev)", TextType.CODE)
+        self.assertEqual(split_nodes_link([node]), [node])
+
 
 class TestExtractMarkdown(unittest.TestCase):
     def test_extract_markdown_image(self):
@@ -284,3 +306,64 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         nodes = text_to_textnodes(text)
         self.assertEqual(nodes, expected_nodes)
+
+    def test_text_to_textnodes_delimiters_in_link_url(self):
+        text = "See [the docs](https://example.com/some_page_name) for **more**"
+        expected_nodes = [
+            TextNode("See ", TextType.TEXT),
+            TextNode("the docs", TextType.LINK, "https://example.com/some_page_name"),
+            TextNode(" for ", TextType.TEXT),
+            TextNode("more", TextType.BOLD),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected_nodes)
+
+    def test_text_to_textnodes_link_inside_bold(self):
+        text = "**read [this](https://boot.dev) now**"
+        expected_nodes = [
+            TextNode("read ", TextType.BOLD),
+            TextNode("this", TextType.LINK, "https://boot.dev"),
+            TextNode(" now", TextType.BOLD),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected_nodes)
+
+    def test_text_to_textnodes_delimiters_in_link_inside_span(self):
+        text = "_see [docs](https://x.com/a_b) and ![a_b](/a_b.png) here_ now"
+        expected_nodes = [
+            TextNode("see ", TextType.ITALIC),
+            TextNode("docs", TextType.LINK, "https://x.com/a_b"),
+            TextNode(" and ", TextType.ITALIC),
+            TextNode("a_b", TextType.IMAGE, "/a_b.png"),
+            TextNode(" here", TextType.ITALIC),
+            TextNode(" now", TextType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected_nodes)
+
+    def test_text_to_textnodes_delimiter_before_link_is_not_closed_by_it(self):
+        with self.assertRaisesRegex(Exception, "Unclosing delimiter issue."):
+            text_to_textnodes("see my_var or [docs](https://x.com/a_b)")
+
+    def test_text_to_textnodes_emphasis_inside_link_text_is_literal(self):
+        self.assertEqual(
+            text_to_textnodes("[**bold**](/x)"),
+            [TextNode("**bold**", TextType.LINK, "/x")],
+        )
+
+    def test_text_to_textnodes_code_is_literal(self):
+        text = "run `a_b **c** [d](e)` here"
+        expected_nodes = [
+            TextNode("run ", TextType.TEXT),
+            TextNode("a_b **c** [d](e)", TextType.CODE),
+            TextNode(" here", TextType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected_nodes)
+
+    def test_text_to_textnodes_not_a_link(self):
+        text = "a [b] (c) and ![d]"
+        self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+
+    def test_text_to_textnodes_empty(self):
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_text_to_textnodes_unclosing_delimiter(self):
+        with self.assertRaisesRegex(Exception, "Unclosing delimiter issue."):
+            text_to_textnodes("This is **bold and never closed")
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    # Each test gets a fresh folder in self.root; relative paths given to
+    # write() are taken below it.
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def read_tree(self, folder):
+        files = {}
+        for dir_path, _, file_names in os.walk(folder):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                with open(path, "rb") as file:
+                    files[os.path.relpath(path, folder)] = file.read()
+        return files
+
+
+class SiteTestCase(TempDirTestCase):
+    # A site with PAGES below self.content_dir and TEMPLATE as its
+    # top-level template.
+    PAGES = {}
+    TEMPLATE = ""
+
+    def setUp(self):
+        super().setUp()
+        self.content_dir = os.path.join(self.root, "content")
+        for path, markdown in self.PAGES.items():
+            self.write(os.path.join(self.content_dir, path), markdown)
+        self.template_path = self.write("template.html", self.TEMPLATE)
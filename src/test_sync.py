@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from sync import SyncStats, sync_file, sync_folder
+from test_support import TempDirTestCase
+
+
+class TestSyncFolder(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src_dir = os.path.join(self.root, "static")
+        self.dest_dir = os.path.join(self.root, "docs")
+        self.write(os.path.join(self.src_dir, "index.css"), "body {}")
+        self.write(os.path.join(self.src_dir, "images", "a.png"), "png")
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_first_sync_copies_everything(self):
+        stats, synced = sync_folder(self.src_dir, self.dest_dir)
+        self.assertEqual(synced, {"index.css", os.path.join("images", "a.png")})
+        self.assertEqual(stats.copied, 2)
+        self.assertEqual(stats.bytes_written, 10)
+        self.assertEqual(
+            self.read(os.path.join(self.dest_dir, "images", "a.png")),
+            "png",
+        )
+
+    def test_unchanged_assets_are_skipped(self):
+        _, synced = sync_folder(self.src_dir, self.dest_dir)
+        stats, _ = sync_folder(self.src_dir, self.dest_dir, synced)
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+
+    def test_changed_asset_is_copied(self):
+        _, synced = sync_folder(self.src_dir, self.dest_dir)
+        self.write(os.path.join(self.src_dir, "index.css"), "body { margin: 0 }")
+        stats, _ = sync_folder(self.src_dir, self.dest_dir, synced)
+        self.assertEqual((stats.copied, stats.skipped), (1, 1))
+        self.assertEqual(
+            self.read(os.path.join(self.dest_dir, "index.css")),
+            "body { margin: 0 }",
+        )
+
+    def test_checksum_skips_touched_asset(self):
+        _, synced = sync_folder(self.src_dir, self.dest_dir)
+        src_path = os.path.join(self.src_dir, "index.css")
+        os.utime(src_path, ns=(0, 10**9))
+        stats, _ = sync_folder(self.src_dir, self.dest_dir, synced, checksum=True)
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+        dest_stat = os.stat(os.path.join(self.dest_dir, "index.css"))
+        self.assertEqual(dest_stat.st_mtime_ns, 10**9)
+
+    def test_orphans_are_removed(self):
+        _, synced = sync_folder(self.src_dir, self.dest_dir)
+        other_page = self.write(os.path.join(self.dest_dir, "index.html"), "page")
+        os.remove(os.path.join(self.src_dir, "images", "a.png"))
+
+        stats, synced = sync_folder(self.src_dir, self.dest_dir, synced)
+        self.assertEqual(stats.removed, 1)
+        self.assertEqual(synced, {"index.css"})
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "images")))
+        self.assertTrue(os.path.isfile(other_page))
+
+    def test_hardlink_mode(self):
+        stats, _ = sync_folder(self.src_dir, self.dest_dir, link_mode="hardlink")
+        self.assertEqual(stats.linked, 2)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.src_dir, "index.css"),
+                os.path.join(self.dest_dir, "index.css"),
+            )
+        )
+
+    def test_reflink_mode_falls_back_to_copy(self):
+        stats = SyncStats()
+        dest_path = os.path.join(self.dest_dir, "index.css")
+        src_path = os.path.join(self.src_dir, "index.css")
+        sync_file(src_path, dest_path, stats, link_mode="reflink")
+        self.assertEqual(stats.copied + stats.linked, 1)
+        self.assertEqual(self.read(dest_path), "body {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, TemplateSet
+from test_support import TempDirTestCase
+
+SOURCE = """<html><head><title>{{ Title }}</title>
+<link href="/index.css" rel="stylesheet" /><script src="//cdn.test/x.js"></script>
+</head><body>{{ Content }}</body></html>"""
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_slots(self):
+        template = Template(SOURCE)
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(len(template.literals), 3)
+        self.assertTrue(template.literals[0].endswith("<title>"))
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{Content}}")
+        self.assertEqual(
+            template.render(Title="Hello", Content="<p>World</p>"),
+            "<h1>Hello</h1><p>World</p>",
+        )
+
+    def test_render_html_node(self):
+        template = Template("<main>{{ Content }}</main>")
+        node = ParentNode("p", [LeafNode("b", "bold")])
+        self.assertEqual(
+            template.render(Content=node),
+            "<main><p><b>bold</b></p></main>",
+        )
+
+    def test_base_path_rewrites_template_attributes(self):
+        template = Template(SOURCE, "/site/")
+        html = template.render(Title="t", Content="")
+        self.assertIn('<link href="/site/index.css"', html)
+        self.assertIn('<script src="//cdn.test/x.js">', html)
+
+    def test_base_path_rewrites_leaf_links_only(self):
+        template = Template("{{ Content }}", "/site/")
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "home", {"href": "/"}),
+                LeafNode("code", 'href="/not-a-link"'),
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "/a"}),
+            ],
+        )
+        self.assertEqual(
+            template.render(Content=node),
+            '<p><a href="/site/">home</a><code>href="/not-a-link"</code>'
+            '<img src="/site/images/a.png" alt="/a" /></p>',
+        )
+
+    def test_missing_slot(self):
+        with self.assertRaisesRegex(ValueError, "Missing value for template slot"):
+            Template("{{ Title }}").render()
+
+
+class TestTemplateSet(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content_dir = os.path.join(self.root, "content")
+        self.default_path = self.write("template.html", "default {{ Content }}")
+
+    def page(self, path):
+        return self.write(os.path.join("content", path), "# page")
+
+    def test_nearest_template_wins(self):
+        blog_path = self.write("content/blog/template.html", "blog {{ Content }}")
+        templates = TemplateSet(self.content_dir, self.default_path, "/site/")
+
+        post = templates.for_page(self.page("blog/2024/post/index.md"))
+        self.assertEqual(post.path, blog_path)
+        self.assertEqual(post.base_path, "/site/")
+        self.assertIs(templates.for_page(self.page("blog/index.md")), post)
+        self.assertEqual(
+            templates.for_page(self.page("contact/index.md")).path,
+            self.default_path,
+        )
+        self.assertEqual(
+            templates.for_page(self.page("index.md")).path, self.default_path
+        )
+
+    def test_content_root_template_overrides_default(self):
+        root_path = self.write("content/template.html", "root {{ Content }}")
+        templates = TemplateSet(self.content_dir, self.default_path)
+        self.assertEqual(templates.for_page(self.page("index.md")).path, root_path)
+        self.assertEqual(templates.for_page(self.page("a/b.md")).path, root_path)
+        self.assertEqual(list(templates.templates), [root_path])
+
+
+if __name__ == "__main__":
+    unittest.main()